@@ -0,0 +1,95 @@
+"""
+Request Metrics Analyzer
+Offline report over the metrics log written by app.py: latency percentiles
+by mode and input-size bucket, plus per-stage breakdowns.
+
+Usage:
+    python analyze_metrics.py [/tmp/humanizer_metrics.jsonl]
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+from collections import defaultdict
+
+
+# Rotated backups are log.1, log.2, ...; other suffixes (log.bak, log.gz) aren't ours
+BACKUP_SUFFIX_RE = re.compile(r'\.(\d+)$')
+
+# Upper bounds (characters) for input-size buckets
+SIZE_BUCKETS = [500, 2000, 5000, 10000]
+
+
+def size_bucket(chars):
+    lower = 0
+    for upper in SIZE_BUCKETS:
+        if chars < upper:
+            return f"{lower}-{upper}"
+        lower = upper
+    return f"{lower}+"
+
+
+def bucket_order(name):
+    return int(name.split('-')[0].rstrip('+'))
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def load_records(path):
+    """Read the active log and its rotated backups, oldest first."""
+    backups = [f for f in glob.glob(f"{glob.escape(path)}.*") if BACKUP_SUFFIX_RE.search(f[len(path):])]
+    backups.sort(key=lambda f: int(BACKUP_SUFFIX_RE.search(f).group(1)), reverse=True)
+    records = []
+    for filename in backups + [path]:
+        if not os.path.exists(filename):
+            continue
+        with open(filename, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue  # Partial line from a crash mid-write
+    return records
+
+
+def report(records):
+    groups = defaultdict(list)
+    for record in records:
+        groups[(record.get('mode'), size_bucket(record.get('input_chars', 0)))].append(record)
+
+    print(f"{len(records)} requests")
+    print(f"{'mode':<10}{'size':>12}{'count':>7}{'errors':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          f"{'ai ms':>9}{'nlp ms':>9}{'tokens in':>11}")
+
+    for (mode, bucket), group in sorted(groups.items(), key=lambda item: (str(item[0][0]), bucket_order(item[0][1]))):
+        latencies = [r['total_ms'] for r in group]
+        errors = sum(1 for r in group if r.get('status', 200) >= 400)
+        stages = [r.get('stages_ms', {}) for r in group]
+        ai_ms = sum(s.get('ai_humanize', 0) + s.get('ai_polish', 0) for s in stages) / len(group)
+        nlp_ms = sum(s.get('nlp', 0) for s in stages) / len(group)
+        tokens = sum(r.get('usage', {}).get('prompt_tokens', 0) for r in group) / len(group)
+
+        print(f"{str(mode):<10}{bucket:>12}{len(group):>7}{errors:>7}"
+              f"{percentile(latencies, 50):>10.0f}{percentile(latencies, 95):>10.0f}{percentile(latencies, 99):>10.0f}"
+              f"{ai_ms:>9.0f}{nlp_ms:>9.0f}{tokens:>11.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze humanizer request metrics")
+    parser.add_argument('path', nargs='?', default=os.getenv('METRICS_LOG', '/tmp/humanizer_metrics.jsonl'))
+    args = parser.parse_args()
+
+    records = load_records(args.path)
+    if not records:
+        print(f"No records found in {args.path}")
+        return
+    report(records)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,15 +3,22 @@ Text Humanizer API Server
 Flask backend with Clerk authentication and Cerebras AI for text humanization.
 """
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, g
 from flask_cors import CORS
 from functools import wraps
 import os
+import time
 import jwt
 import requests
 from dotenv import load_dotenv
 
-from humanizer import humanize_text
+from humanizer import NLPUnavailableError, TOKENIZERS, PROFILES, get_default_engine
+from compression import StaticAssetCache, STATIC_ASSETS, compress_response
+from rate_limit import create_rate_limiter
+from prompts import TokenUsage
+from metrics import create_metrics_writer, timed
+from resilience import create_ai_caller, CircuitOpenError
+from incremental import DocumentCache, humanize_incremental, settings_key, split_paragraphs
 from cerebras_client import humanize_with_ai, polish_with_ai
 
 # Load environment variables
@@ -19,6 +26,31 @@ load_dotenv()
 
 app = Flask(__name__, static_folder='.')
 CORS(app, origins=['*'], supports_credentials=True)
+app.after_request(compress_response)
+
+# Precompressed, fingerprinted copies of the frontend files
+static_cache = StaticAssetCache(app.root_path)
+
+# Shared NLP engine. Resources load eagerly here, so request threads
+# never race on NLTK's lazy loaders. If the NLTK data can't be loaded the
+# app still starts (AI-only mode and static pages keep working) and the
+# engine is retried when an NLP mode is requested.
+try:
+    get_default_engine()
+except NLPUnavailableError as e:
+    print(f"{e}; will retry on first NLP request")
+
+# Per-user request budgets (NLP-only vs AI-backed work)
+rate_limiter = create_rate_limiter()
+
+# Hedging and circuit breaking for Cerebras calls
+ai_caller = create_ai_caller()
+
+# Per-request metrics log (None when METRICS_LOG is empty)
+metrics_writer = create_metrics_writer()
+
+# Last paragraph outputs per document, for incremental re-humanization
+document_cache = DocumentCache()
 
 # Clerk configuration
 CLERK_PUBLISHABLE_KEY = os.getenv('NEXT_PUBLIC_CLERK_PUBLISHABLE_KEY', '')
@@ -134,20 +166,179 @@ def require_auth(f):
     return decorated_function
 
 
+def document_settings(data):
+    """Incremental-cache fingerprint of a request's settings (everything but the text)."""
+    options = dict(data.get('options') or {}, profile=data.get('profile'))
+    return settings_key(data.get('mode', 'balanced'), data.get('intensity', 'medium'),
+                        [options, data.get('tokenizer')])
+
+
+def is_fully_cached(user_id, data):
+    """True if a document request will be served entirely from the document cache."""
+    document_id = data.get('document_id')
+    text = data.get('text')
+    if not document_id or data.get('regenerate') or not isinstance(text, str):
+        return False
+    return document_cache.covers(user_id, document_id, document_settings(data), text)
+
+
+def rate_limited(f):
+    """
+    Decorator to enforce per-user rate limits (use after require_auth).
+    AI modes are charged against the NLP budget when the document cache
+    already holds every paragraph. Requests over budget get an immediate
+    429 instead of queueing; if the limiter itself fails (e.g. its SQLite
+    file is locked) the request gets a 503.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        data = request.get_json(silent=True) or {}
+        kind = 'nlp' if data.get('mode') == 'nlp_only' else 'ai'
+        # A resubmitted document whose paragraphs are all cached makes no AI calls
+        if kind == 'ai' and is_fully_cached(request.user_id, data):
+            kind = 'nlp'
+        
+        try:
+            decision = rate_limiter.acquire(request.user_id, kind)
+        except Exception as e:
+            print(f"Rate limiter error: {e}")
+            return jsonify({
+                'success': False,
+                'error': 'Rate limiter unavailable, please retry shortly',
+                'code': 'RATE_LIMIT_UNAVAILABLE'
+            }), 503
+        
+        if not decision.allowed:
+            response = jsonify({
+                'success': False,
+                'error': decision.reason,
+                'code': 'RATE_LIMITED',
+                'retryAfter': decision.retry_after
+            })
+            response.headers['Retry-After'] = str(decision.retry_after)
+            return response, 429
+        
+        try:
+            return f(*args, **kwargs)
+        finally:
+            decision.release()
+    
+    return decorated_function
+
+
 @app.route('/')
 def index():
     """Serve the main HTML page."""
-    return send_from_directory('.', 'index.html')
+    return static_cache.serve('index.html')
 
 
 @app.route('/<path:filename>')
 def serve_static(filename):
     """Serve static files (CSS, JS)."""
+    if filename in STATIC_ASSETS:
+        return static_cache.serve(filename)
     return send_from_directory('.', filename)
 
 
+# Default for options['single_call'] (one Cerebras call for humanize + polish)
+SINGLE_CALL_POLISH = os.getenv('PROMPT_SINGLE_CALL', 'false').lower() == 'true'
+
+# Reported in 'steps' when AI modes are served by the NLP fallback
+FALLBACK_STEP = 'AI Unavailable (NLP Fallback)'
+
+
+def humanize_paragraphs(text, nlp_options):
+    """Apply NLP techniques paragraph by paragraph so blank-line breaks survive."""
+    engine = get_default_engine()
+    return "\n\n".join(engine.humanize_text(p, nlp_options) for p in split_paragraphs(text))
+
+
+def run_pipeline(text, mode, intensity, options, tokenizer=None, usage=None, timings=None):
+    """
+    Run the humanization pipeline for one chunk of text.
+    
+    Falls back to NLP-only output while the Cerebras circuit breaker is open.
+    With options['single_call'], balanced mode folds the AI polish into the
+    humanize call instead of resending the text for a second pass. Nothing
+    would polish the NLP enhancement's output after that, so the step is
+    skipped and the result is the polished AI output as-is.
+    
+    Stage durations are added to `timings` (milliseconds) when given.
+    
+    Returns:
+        (humanized text, list of step names)
+    """
+    result = text
+    steps = []
+    ai_polish = mode not in ('ai_only', 'nlp_only') and options.get('ai_polish', False)
+    single_call = ai_polish and options.get('single_call', SINGLE_CALL_POLISH)
+    
+    if mode != 'nlp_only':
+        try:
+            with timed(timings, 'ai_humanize'):
+                ai_result = ai_caller.call(humanize_with_ai, result, intensity, polish=single_call, usage=usage)
+        except CircuitOpenError:
+            result, steps = run_pipeline(text, 'nlp_only', intensity, options, tokenizer, timings=timings)
+            return result, [FALLBACK_STEP] + steps
+    
+    if mode == 'ai_only':
+        # Only use AI humanization
+        steps.append('AI Humanization')
+        result = ai_result
+        
+    elif mode == 'nlp_only':
+        # Only use NLP techniques
+        steps.append('NLP Processing')
+        nlp_options = {
+            'synonyms': options.get('synonyms', True),
+            'contractions': options.get('contractions', True),
+            'vary_length': options.get('vary_length', True),
+            'informal': options.get('informal', True),
+            'casual_starters': options.get('casual_starters', True),
+            'synonym_rate': 0.1 if intensity == 'light' else (0.2 if intensity == 'medium' else 0.3),
+            'informal_rate': 0.05 if intensity == 'light' else (0.1 if intensity == 'medium' else 0.15),
+            'tokenizer': tokenizer,
+            'profile': options.get('profile'),
+        }
+        with timed(timings, 'nlp'):
+            result = humanize_paragraphs(result, nlp_options)
+    else:  # balanced mode
+        # Step 1: AI humanization first
+        steps.append('AI Humanization + Polish' if single_call else 'AI Humanization')
+        result = ai_result
+        
+        # Step 2: Apply NLP techniques for additional variation (only when
+        # a separate polish pass follows to clean up their artifacts)
+        if single_call:
+            return result, steps
+        
+        steps.append('NLP Enhancement')
+        nlp_options = {
+            'synonyms': options.get('synonyms', True),
+            'synonym_rate': 0.08,  # Lower rate since AI already made changes
+            'contractions': options.get('contractions', True),
+            'vary_length': False,  # AI handles this well
+            'informal': options.get('informal', False),  # Light touch
+            'informal_rate': 0.05,
+            'casual_starters': False,  # AI handles this
+            'tokenizer': tokenizer,
+            'profile': options.get('profile'),
+        }
+        with timed(timings, 'nlp'):
+            result = humanize_paragraphs(result, nlp_options)
+        
+        # Step 3: Optional AI polish
+        if ai_polish:
+            steps.append('AI Polish')
+            with timed(timings, 'ai_polish'):
+                result = polish_with_ai(result, usage=usage)
+    
+    return result, steps
+
+
 @app.route('/api/humanize', methods=['POST'])
 @require_auth
+@rate_limited
 def humanize():
     """
     Main humanization endpoint (requires authentication).
@@ -157,16 +348,28 @@ def humanize():
         "text": "Text to humanize",
         "mode": "balanced" | "nlp_only" | "ai_only",
         "intensity": "light" | "medium" | "heavy",
+        "tokenizer": "nltk" | "regex",  (optional, defaults to HUMANIZER_TOKENIZER)
+        "profile": "fast" | "balanced" | "thorough",  (optional NLP performance profile)
+        "include_original": true,  (optional, set false to omit 'original' from the response)
+        "document_id": "...",  (optional, enables incremental re-humanization)
+        "regenerate": false,  (optional, reprocess every paragraph of the document)
         "options": {
             "synonyms": true,
             "contractions": true,
             "vary_length": true,
             "informal": true,
             "casual_starters": true,
-            "ai_polish": true
+            "ai_polish": true,
+            "single_call": false  (humanize and polish in one AI call, without NLP enhancement)
         }
     }
+    
+    With a document_id, paragraphs unchanged since the last submission of
+    that document (with the same settings) reuse their previous output,
+    unless regenerate is set.
     """
+    g.request_start = time.perf_counter()
+    
     try:
         data = request.get_json()
         
@@ -180,60 +383,88 @@ def humanize():
         mode = data.get('mode', 'balanced')
         intensity = data.get('intensity', 'medium')
         options = data.get('options', {})
+        tokenizer = data.get('tokenizer')
+        profile = data.get('profile')
+        document_id = data.get('document_id')
+        
+        if tokenizer is not None and tokenizer not in TOKENIZERS:
+            return jsonify({'error': f"Unknown tokenizer: {tokenizer}"}), 400
+        if profile is not None and profile not in PROFILES:
+            return jsonify({'error': f"Unknown profile: {profile}"}), 400
+        options = dict(options, profile=profile)
         
-        result = text
-        steps = []
+        # Fail before spending an AI call if the NLP stage can't run
+        if mode != 'ai_only':
+            get_default_engine()
         
-        if mode == 'ai_only':
-            # Only use AI humanization
-            steps.append('AI Humanization')
-            result = humanize_with_ai(result, intensity)
+        response = {'success': True}
+        usage = TokenUsage()
+        timings = {}
+        g.metrics = {
+            'mode': mode,
+            'intensity': intensity,
+            'input_chars': len(text),
+            'input_words': len(text.split()),
+            'tokenizer': tokenizer,
+            'profile': profile,
+            'stages_ms': timings,
+            'usage': usage,
+        }
+        
+        if document_id:
+            settings = document_settings(data)
+            if data.get('regenerate'):
+                cached = {}
+            else:
+                cached = document_cache.get(request.user_id, document_id, settings)
+            steps = []
+            degraded_chunks = []
             
-        elif mode == 'nlp_only':
-            # Only use NLP techniques
-            steps.append('NLP Processing')
-            nlp_options = {
-                'synonyms': options.get('synonyms', True),
-                'contractions': options.get('contractions', True),
-                'vary_length': options.get('vary_length', True),
-                'informal': options.get('informal', True),
-                'casual_starters': options.get('casual_starters', True),
-                'synonym_rate': 0.1 if intensity == 'light' else (0.2 if intensity == 'medium' else 0.3),
-                'informal_rate': 0.05 if intensity == 'light' else (0.1 if intensity == 'medium' else 0.15),
-            }
-            result = humanize_text(result, nlp_options)
-        else:  # balanced mode
-            # Step 1: AI humanization first
-            steps.append('AI Humanization')
-            result = humanize_with_ai(result, intensity)
+            def process(chunk):
+                result, chunk_steps = run_pipeline(chunk, mode, intensity, options, tokenizer, usage, timings)
+                # Chunks can take different paths (e.g. only some hit the fallback)
+                steps.extend(step for step in chunk_steps if step not in steps)
+                if FALLBACK_STEP in chunk_steps:
+                    degraded_chunks.append(chunk)
+                return result
             
-            # Step 2: Apply NLP techniques for additional variation
-            steps.append('NLP Enhancement')
-            nlp_options = {
-                'synonyms': options.get('synonyms', True),
-                'synonym_rate': 0.08,  # Lower rate since AI already made changes
-                'contractions': options.get('contractions', True),
-                'vary_length': False,  # AI handles this well
-                'informal': options.get('informal', False),  # Light touch
-                'informal_rate': 0.05,
-                'casual_starters': False,  # AI handles this
-            }
-            result = humanize_text(result, nlp_options)
+            result, outputs, reused, processed = humanize_incremental(text, process, cached)
+            degraded = bool(degraded_chunks)
+            # Don't let degraded fallback output stand in for the real thing later
+            if not degraded:
+                document_cache.put(request.user_id, document_id, settings, outputs)
             
-            # Step 3: Optional AI polish
-            if options.get('ai_polish', False):
-                steps.append('AI Polish')
-                result = polish_with_ai(result)
+            if reused:
+                steps.append('Reused Cached Output')
+            response['incremental'] = {'reused': reused, 'processed': processed}
+        else:
+            result, steps = run_pipeline(text, mode, intensity, options, tokenizer, usage, timings)
+            degraded = FALLBACK_STEP in steps
         
-        return jsonify({
-            'success': True,
-            'original': text,
+        response.update({
             'humanized': result,
             'mode': mode,
             'intensity': intensity,
-            'steps': steps
+            'steps': steps,
+            'usage': usage.to_dict()
+        })
+        if data.get('include_original', True):
+            response['original'] = text
+        
+        g.metrics.update({
+            'output_chars': len(result),
+            'degraded': degraded,
+            'incremental': response.get('incremental'),
         })
         
+        return jsonify(response)
+        
+    except NLPUnavailableError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'code': 'NLP_UNAVAILABLE'
+        }), 503
     except Exception as e:
         return jsonify({
             'success': False,
@@ -241,10 +472,40 @@ def humanize():
         }), 500
 
 
+@app.after_request
+def log_request_metrics(response):
+    """Queue a metrics record for requests that reached the pipeline."""
+    metrics = g.pop('metrics', None)
+    if metrics is None or metrics_writer is None:
+        return response
+    
+    metrics.update({
+        'ts': time.time(),
+        'status': response.status_code,
+        'total_ms': (time.perf_counter() - g.request_start) * 1000,
+        'usage': metrics['usage'].to_dict(),
+    })
+    metrics_writer.record(metrics)
+    return response
+
+
 @app.route('/api/health', methods=['GET'])
 def health():
     """Health check endpoint (no auth required)."""
-    return jsonify({'status': 'ok', 'service': 'Text Humanizer API'})
+    caches = {'documents': document_cache.stats()}
+    try:
+        caches.update(get_default_engine().cache_stats())
+        nlp_status = 'ok'
+    except NLPUnavailableError:
+        nlp_status = 'unavailable'
+    
+    return jsonify({
+        'status': 'ok',
+        'service': 'Text Humanizer API',
+        'nlp': nlp_status,
+        'caches': caches,
+        'ai': ai_caller.stats()
+    })
 
 
 @app.route('/api/auth/check', methods=['GET'])
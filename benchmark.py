@@ -0,0 +1,184 @@
+"""
+Humanizer Benchmarks
+Quick timing and accuracy comparisons for the NLP pipeline.
+
+Usage:
+    python benchmark.py tokenizers [--iterations N]
+    python benchmark.py hedging [--requests N] [--slow-rate R]
+    python benchmark.py prompts
+    python benchmark.py profiles [--iterations N]
+"""
+
+import argparse
+import time
+
+from humanizer import TOKENIZERS, PROFILES
+
+
+SAMPLE_TEXT = """Artificial intelligence has revolutionized numerous industries. It has enabled unprecedented advancements in healthcare, finance, and transportation. The implementation of machine learning algorithms has facilitated the automation of complex tasks. Furthermore, natural language processing has enhanced human-computer interaction significantly. These technological developments have created new opportunities for businesses and individuals alike.
+
+Dr. Smith's team at the U.S. lab didn't expect the results. "It works!" she said, after 3.5 years of effort. The system, which runs on commodity hardware, processes about 10,000 documents per hour; that's roughly twice the previous rate. Was it worth it? Most reviewers think so, e.g. the board approved a second phase in Jan. 2024 and the budget grew by 40%."""
+
+
+def time_call(fn, iterations):
+    """Return the mean wall time of fn() in milliseconds."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) * 1000 / iterations
+
+
+def bench_tokenizers(args):
+    """Compare tokenizer backends for speed and agreement with NLTK."""
+    text = SAMPLE_TEXT * args.scale
+    reference = TOKENIZERS['nltk']
+    ref_sentences = reference.sent_tokenize(text)
+    ref_words = sum(len(reference.word_tokenize(s)) for s in ref_sentences)
+
+    print(f"Input: {len(text)} chars, {len(ref_sentences)} sentences (NLTK), {ref_words} words (NLTK)")
+    print(f"{'backend':<10}{'sent ms':>10}{'words ms':>10}{'sent match':>12}{'word err':>10}")
+
+    for name, tokenizer in TOKENIZERS.items():
+        sentences = tokenizer.sent_tokenize(text)
+        words = sum(len(tokenizer.word_tokenize(s)) for s in sentences)
+
+        sent_ms = time_call(lambda: tokenizer.sent_tokenize(text), args.iterations)
+        word_ms = time_call(lambda: [tokenizer.word_tokenize(s) for s in sentences], args.iterations)
+
+        # Accuracy: fraction of NLTK sentences reproduced exactly, relative word count error
+        matched = len(set(sentences) & set(ref_sentences)) / len(set(ref_sentences))
+        word_err = abs(words - ref_words) / ref_words
+
+        print(f"{name:<10}{sent_ms:>10.2f}{word_ms:>10.2f}{matched:>11.1%}{word_err:>10.1%}")
+
+
+def percentiles(latencies, points=(50, 95, 99)):
+    """Latency percentiles in milliseconds."""
+    ordered = sorted(latencies)
+    return [ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] * 1000 for p in points]
+
+
+def bench_hedging(args):
+    """Compare Cerebras call latency with and without hedging against the local mock."""
+    import cerebras_client
+    from mock_cerebras import MockConfig, start_mock_server
+    from resilience import CircuitBreaker, ResilientCaller
+
+    config = MockConfig(latency=args.latency, slow_rate=args.slow_rate, slow_latency=args.slow_latency)
+    server, cerebras_client.API_URL = start_mock_server(config)
+    text = SAMPLE_TEXT.split("\n\n")[0]
+
+    print(f"Mock: {args.latency * 1000:.0f}ms typical, {args.slow_rate:.0%} of calls take {args.slow_latency:.1f}s")
+    print(f"{'strategy':<12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'hedged':>8}")
+
+    for hedge in (False, True):
+        # Breaker thresholds high enough that it never opens here
+        caller = ResilientCaller(
+            breaker=CircuitBreaker(error_rate=1.1, slow_call_rate=1.1),
+            hedge=hedge,
+            hedge_percentile=args.percentile,
+            min_hedge_delay=args.latency,
+        )
+        latencies = []
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            caller.call(cerebras_client.humanize_with_ai, text, "medium")
+            latencies.append(time.perf_counter() - start)
+
+        p50, p95, p99 = percentiles(latencies)
+        name = 'hedged' if hedge else 'single'
+        print(f"{name:<12}{p50:>10.0f}{p95:>10.0f}{p99:>10.0f}{caller.hedged_calls:>8}")
+
+    server.shutdown()
+
+
+def bench_prompts(args):
+    """
+    Estimated prompt tokens for the balanced+polish path, two calls vs one.
+    Both end with an AI polish, but the single-call path skips the NLP
+    enhancement step (nothing would polish it afterwards), so its output
+    has less NLP variation.
+    """
+    import prompts
+
+    text = SAMPLE_TEXT * args.scale
+    full_messages = [
+        {"role": "system", "content": prompts.FULL_SYSTEM_PROMPT},
+        {"role": "user", "content": prompts.quote(text)},
+    ]
+    baseline = prompts.estimate_messages(full_messages)
+
+    print(f"Input: {len(text)} chars, ~{prompts.estimate_tokens(text)} tokens; full-prompt humanize call ~{baseline} tokens")
+    print(f"{'intensity':<10}{'variant':>9}{'humanize':>10}{'polish':>8}{'two-call':>10}{'single':>8}{'saved':>8}")
+
+    for intensity in prompts.INTENSITY_PROMPTS:
+        variant = prompts.choose_variant(intensity, prompts.estimate_tokens(text))
+        _, humanize_tokens = prompts.build_humanize_messages(text, intensity)
+        _, polish_tokens = prompts.build_polish_messages(text)
+        _, single_tokens = prompts.build_humanize_messages(text, intensity, polish=True)
+        two_call = humanize_tokens + polish_tokens
+        saved = 1 - single_tokens / two_call
+
+        print(f"{intensity:<10}{variant:>9}{humanize_tokens:>10}{polish_tokens:>8}{two_call:>10}{single_tokens:>8}{saved:>8.0%}")
+
+
+def bench_profiles(args):
+    """Throughput and latency of the NLP pipeline under each performance profile."""
+    from humanizer import Humanizer
+
+    # No analysis or segment cache, so every iteration pays the full cost
+    engine = Humanizer(cache_bytes=0, segment_cache_bytes=0)
+    paragraphs = [p for p in SAMPLE_TEXT.split("\n\n")] * args.scale
+    words = sum(len(p.split()) for p in paragraphs)
+
+    print(f"Input: {len(paragraphs)} paragraphs, {words} words per iteration")
+    print(f"{'profile':<10}{'lexicon':>20}{'docs/s':>9}{'words/s':>10}{'p50 ms':>9}{'p95 ms':>9}")
+
+    for name, profile in PROFILES.items():
+        # Reports 'wordnet (fallback)' when lexicon.json hasn't been built
+        lexicon = engine.lexicon_sources[profile['lexicon']]
+        options = {'profile': name, 'seed': 0, 'synonym_rate': 0.2}
+        latencies = []
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            for paragraph in paragraphs:
+                engine.humanize_text(paragraph, options)
+            latencies.append(time.perf_counter() - start)
+
+        total = sum(latencies)
+        p50, p95 = percentiles(latencies, (50, 95))
+        print(f"{name:<10}{lexicon:>20}{args.iterations / total:>9.1f}{words * args.iterations / total:>10.0f}{p50:>9.1f}{p95:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Humanizer benchmarks")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    tokenizers = subparsers.add_parser('tokenizers', help="Tokenizer speed vs accuracy")
+    tokenizers.add_argument('--iterations', type=int, default=50)
+    tokenizers.add_argument('--scale', type=int, default=10, help="Repeat the sample text N times")
+    tokenizers.set_defaults(func=bench_tokenizers)
+
+    hedging = subparsers.add_parser('hedging', help="Hedged vs single Cerebras calls against a mock")
+    hedging.add_argument('--requests', type=int, default=200)
+    hedging.add_argument('--latency', type=float, default=0.05, help="Typical mock latency (s)")
+    hedging.add_argument('--slow-rate', type=float, default=0.05)
+    hedging.add_argument('--slow-latency', type=float, default=1.0)
+    hedging.add_argument('--percentile', type=float, default=90)
+    hedging.set_defaults(func=bench_hedging)
+
+    prompt_sizes = subparsers.add_parser('prompts', help="Prompt token estimates per intensity")
+    prompt_sizes.add_argument('--scale', type=int, default=1, help="Repeat the sample text N times")
+    prompt_sizes.set_defaults(func=bench_prompts)
+
+    profiles = subparsers.add_parser('profiles', help="NLP pipeline speed per performance profile")
+    profiles.add_argument('--iterations', type=int, default=20)
+    profiles.add_argument('--scale', type=int, default=5, help="Repeat the sample paragraphs N times")
+    profiles.set_defaults(func=bench_profiles)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
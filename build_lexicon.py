@@ -0,0 +1,158 @@
+"""
+Precomputed Lexicon Builder
+Writes the synonym table used by the 'precomputed' lexicon (and the 'fast'
+profile), so requests can skip WordNet entirely. Lookups use the word as
+typed, so the table also holds inflected forms (industries, created).
+
+Usage:
+    python build_lexicon.py [--output lexicon.json] [--min-count 1]
+"""
+
+import argparse
+import json
+from collections import defaultdict
+
+from humanizer import LEXICON_PATH, PROTECTED_WORDS, NLPUnavailableError, WordNetLexicon, ensure_nltk_data
+
+
+# Inflections generated per POS ('s' is the noun plural / verb third person)
+INFLECTIONS = {'n': ('s',), 'v': ('s', 'ed', 'ing')}
+
+VOWELS = 'aeiou'
+
+
+def regular_form(base, suffix):
+    """Regular English spelling of base + suffix (no consonant doubling)."""
+    if suffix == 's':
+        if base.endswith(('s', 'x', 'z', 'ch', 'sh')):
+            return base + 'es'
+        if base.endswith('y') and base[-2:-1] not in VOWELS:
+            return base[:-1] + 'ies'
+        return base + 's'
+    if suffix == 'ed':
+        if base.endswith('e'):
+            return base + 'd'
+        if base.endswith('y') and base[-2:-1] not in VOWELS:
+            return base[:-1] + 'ied'
+        return base + 'ed'
+    if base.endswith('ie'):
+        return base[:-2] + 'ying'
+    if base.endswith('e') and not base.endswith('ee'):
+        return base[:-1] + 'ing'
+    return base + 'ing'
+
+
+def load_exceptions(wordnet):
+    """{pos: {base: [irregular inflected forms]}} from WordNet's .exc files."""
+    exceptions = {}
+    for pos, name in (('n', 'noun'), ('v', 'verb')):
+        forms = defaultdict(list)
+        stream = wordnet.open(f'{name}.exc')
+        try:
+            for line in stream:
+                inflected, *bases = line.split()
+                for base in bases:
+                    forms[base].append(inflected)
+        finally:
+            stream.close()
+        exceptions[pos] = forms
+    return exceptions
+
+
+def surface_form(base, pos, suffix, exceptions, wordnet):
+    """
+    The base + suffix inflection of a word, or None if it can't be formed
+    reliably. Irregular spellings (children, stopped, ran) come from the
+    exception lists; a verb with an irregular past gets no 'ed' form.
+    """
+    irregular = exceptions[pos].get(base, [])
+    if pos == 'n' and irregular:
+        return irregular[0] if len(irregular) == 1 else None
+
+    matches = [form for form in irregular if form.endswith(suffix)]
+    if len(matches) == 1:
+        return matches[0]
+    if matches:
+        return None
+    if suffix == 'ed' and any(not form.endswith(('s', 'ing')) for form in irregular):
+        return None  # Irregular past (ran, went)
+
+    form = regular_form(base, suffix)
+    return form if wordnet.morphy(form, pos) == base else None
+
+
+def inflected_entries(table, exceptions, wordnet, limit=5):
+    """
+    Entries for inflected surface forms ("industries|n", "created|v") of the
+    base-form entries in table, mapped to the same inflection of each
+    synonym. The runtime looks words up as typed, without lemmatizing.
+    """
+    entries = {}
+    for key, synonyms in table.items():
+        word, pos = key.split('|')
+        for suffix in INFLECTIONS.get(pos, ()):
+            form = surface_form(word, pos, suffix, exceptions, wordnet)
+            if form is None or form == word:
+                continue
+
+            inflected = []
+            for synonym in synonyms:
+                synonym_form = surface_form(synonym.lower(), pos, suffix, exceptions, wordnet)
+                if synonym_form and synonym_form != form and synonym_form not in inflected:
+                    inflected.append(synonym_form)
+            if inflected:
+                entries.setdefault(f"{form}|{pos}", inflected[:limit])
+    return entries
+
+
+def build_table(min_count=1, limit=5):
+    """
+    Map "word|pos" to its top synonyms for every single-word WordNet lemma
+    that appears at least min_count times in the SemCor frequency counts,
+    plus the noun and verb inflections of those words. Rare words are left
+    out to keep the table small.
+    """
+    if not ensure_nltk_data():
+        raise NLPUnavailableError("WordNet data is required to build the lexicon")
+    from nltk.corpus import wordnet
+
+    lexicon = WordNetLexicon()
+    table = {}
+
+    for synset in wordnet.all_synsets():
+        pos = 'a' if synset.pos() == 's' else synset.pos()
+        for lemma in synset.lemmas():
+            word = lemma.name().lower()
+            if '_' in word or len(word) < 4 or word in PROTECTED_WORDS or lemma.count() < min_count:
+                continue
+
+            key = f"{word}|{pos}"
+            if key in table:
+                continue
+
+            synonyms = lexicon.synonyms(word, pos)[:limit]
+            if synonyms:
+                table[key] = synonyms
+
+    # Base forms win when an inflection collides with another lemma
+    for key, synonyms in inflected_entries(table, load_exceptions(wordnet), wordnet, limit).items():
+        table.setdefault(key, synonyms)
+
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the precomputed synonym lexicon")
+    parser.add_argument('--output', default=LEXICON_PATH)
+    parser.add_argument('--min-count', type=int, default=1, help="Minimum SemCor frequency of a word")
+    args = parser.parse_args()
+
+    table = build_table(args.min_count)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(table, f, separators=(',', ':'), sort_keys=True)
+
+    print(f"Wrote {len(table)} entries to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
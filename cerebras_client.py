@@ -8,69 +8,34 @@ import requests
 import json
 from dotenv import load_dotenv
 
+from prompts import FULL_SYSTEM_PROMPT, build_humanize_messages, build_polish_messages
+
 # Load environment variables from .env file
 load_dotenv()
 
-API_URL = "https://api.cerebras.ai/v1/chat/completions"
+API_URL = os.getenv("CEREBRAS_API_URL", "https://api.cerebras.ai/v1/chat/completions")
 API_KEY = os.getenv("CEREBRAS_API_KEY")
 MODEL = os.getenv("CEREBRAS_MODEL", "llama-3.3-70b")
 
-HUMANIZE_SYSTEM_PROMPT = """You are an expert text humanizer. Your job is to rewrite AI-generated text to make it sound naturally human-written while preserving the original meaning.
-
-Apply these humanization techniques:
-
-1. **Sentence Variation**: Mix short, punchy sentences with longer, flowing ones. Humans don't write uniformly.
-
-2. **Contractions**: Use contractions naturally (don't, it's, we're, they've). AI tends to avoid them.
-
-3. **Informal Transitions**: Use casual connectors like "Plus," "Thing is," "Here's the deal," "Look," occasionally.
-
-4. **Natural Redundancies**: Humans sometimes restate things slightly differently for emphasis.
-
-5. **Conversational Tone**: Add occasional personal touches, rhetorical questions, or asides.
-
-6. **Imperfect Structure**: Start some sentences with "And" or "But". Use fragments occasionally.
-
-7. **Active Voice**: Prefer active voice but mix in passive occasionally for variety.
+# Kept for callers that used the prompt directly
+HUMANIZE_SYSTEM_PROMPT = FULL_SYSTEM_PROMPT
 
-8. **Idiomatic Expressions**: Sprinkle in common idioms and colloquialisms where appropriate.
 
-9. **Varied Paragraph Lengths**: Some paragraphs can be just one sentence. Others longer.
-
-10. **Reduce Formality**: Avoid overly formal constructions that sound robotic.
-
-IMPORTANT RULES:
-- Keep the core meaning and information intact
-- Don't add new facts or claims
-- Don't make it too casual if the original is academic/professional
-- Match the general tone but make it feel human
-- Output ONLY the rewritten text, no explanations or meta-commentary"""
-
-
-def humanize_with_ai(text: str, intensity: str = "medium") -> str:
+def humanize_with_ai(text: str, intensity: str = "medium", polish: bool = False, usage=None) -> str:
     """
     Use Cerebras AI to humanize the given text.
     
     Args:
         text: The text to humanize
         intensity: How aggressively to humanize ("light", "medium", "heavy")
+        polish: Also polish for readability in the same call
+        usage: Optional prompts.TokenUsage to record token counts in
     
     Returns:
         Humanized text from the AI
     """
     
-    intensity_prompts = {
-        "light": "Make subtle changes to sound more natural. Keep most of the original structure.",
-        "medium": "Rewrite to sound genuinely human while keeping the meaning. Apply moderate changes.",
-        "heavy": "Significantly rewrite to sound completely human-written. Be creative with structure and phrasing."
-    }
-    
-    user_prompt = f"""{intensity_prompts.get(intensity, intensity_prompts["medium"])}
-
-Text to humanize:
-\"\"\"
-{text}
-\"\"\""""
+    messages, estimated_tokens = build_humanize_messages(text, intensity, polish)
 
     headers = {
         "Authorization": f"Bearer {API_KEY}",
@@ -79,10 +44,7 @@ Text to humanize:
     
     payload = {
         "model": MODEL,
-        "messages": [
-            {"role": "system", "content": HUMANIZE_SYSTEM_PROMPT},
-            {"role": "user", "content": user_prompt}
-        ],
+        "messages": messages,
         "max_tokens": 4096,
         "temperature": 0.8,  # Higher temperature for more creative/varied output
         "top_p": 0.95
@@ -93,6 +55,8 @@ Text to humanize:
         response.raise_for_status()
         
         result = response.json()
+        if usage is not None:
+            usage.record(estimated_tokens, result)
         
         if "choices" in result and len(result["choices"]) > 0:
             return result["choices"][0]["message"]["content"].strip()
@@ -105,17 +69,12 @@ Text to humanize:
         raise Exception(f"Cerebras API error: {str(e)}")
 
 
-def polish_with_ai(text: str) -> str:
+def polish_with_ai(text: str, usage=None) -> str:
     """
     Light polish pass to clean up text after NLP processing.
     """
     
-    polish_prompt = """Lightly polish this text for readability. Fix any awkward phrasing from automated processing, but keep the content and style intact. Only make minimal necessary corrections.
-
-Text:
-\"\"\"
-{text}
-\"\"\""""
+    messages, estimated_tokens = build_polish_messages(text)
 
     headers = {
         "Authorization": f"Bearer {API_KEY}",
@@ -124,10 +83,7 @@ Text:
     
     payload = {
         "model": MODEL,
-        "messages": [
-            {"role": "system", "content": "You are a text editor. Make minimal corrections for readability. Output only the polished text."},
-            {"role": "user", "content": polish_prompt.format(text=text)}
-        ],
+        "messages": messages,
         "max_tokens": 4096,
         "temperature": 0.3  # Lower temperature for conservative edits
     }
@@ -137,6 +93,8 @@ Text:
         response.raise_for_status()
         
         result = response.json()
+        if usage is not None:
+            usage.record(estimated_tokens, result)
         
         if "choices" in result and len(result["choices"]) > 0:
             return result["choices"][0]["message"]["content"].strip()
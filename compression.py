@@ -0,0 +1,208 @@
+"""
+Response Compression and Static Asset Caching
+Precompressed static assets with content-hashed ETags, plus on-the-fly
+compression for large API responses.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+
+from flask import abort, request, Response
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is always available
+    brotli = None
+
+
+# Assets that get precompressed and fingerprinted at startup
+STATIC_ASSETS = ['index.html', 'style.css', 'script.js']
+
+# Pages reference assets by name, so they must revalidate; the assets
+# themselves are requested with ?v=<hash> and can be cached for a year
+HTML_CACHE_CONTROL = 'no-cache'
+ASSET_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+UNVERSIONED_CACHE_CONTROL = 'public, max-age=300'
+
+# Responses smaller than this aren't worth compressing
+MIN_COMPRESS_SIZE = 1024
+
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'image/svg+xml')
+
+
+def content_hash(data):
+    """Short content hash used for ETags and asset version strings."""
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def compress(data, encoding):
+    """Compress bytes with the given Content-Encoding."""
+    if encoding == 'br':
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9)
+
+
+def choose_encoding(available):
+    """
+    Pick the encoding from `available` with the highest q-value the client
+    sends, preferring br over gzip on ties. q=0 means "not acceptable".
+    """
+    accepted = request.accept_encodings
+    best, best_quality = None, 0
+    for encoding in ('br', 'gzip'):
+        quality = accepted[encoding]  # Also matches "*"; 0 if not listed
+        if encoding in available and quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class StaticAsset:
+    """
+    One file's bytes in every encoding, keyed by content hash. For pages,
+    `versions` records the asset hashes the page was built to reference.
+    """
+
+    def __init__(self, path, data, versions=None):
+        self.path = path
+        self.versions = versions or {}
+        self.mtime = os.path.getmtime(path)
+        self.mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        self.etag = content_hash(data)
+        self.variants = {None: data}
+
+        if self.mimetype.startswith(COMPRESSIBLE_TYPES) and len(data) >= MIN_COMPRESS_SIZE:
+            self.variants['gzip'] = compress(data, 'gzip')
+            if brotli is not None:
+                self.variants['br'] = compress(data, 'br')
+
+
+class StaticAssetCache:
+    """Serves files from a directory with precompressed variants and ETags."""
+
+    def __init__(self, directory, assets=STATIC_ASSETS):
+        self.directory = directory
+        self._assets = {}
+        self._lock = threading.RLock()  # page rebuilds fetch asset hashes
+
+        for filename in assets:
+            try:
+                self.get(filename)
+            except FileNotFoundError:
+                pass
+
+    def get(self, filename):
+        """Return the cached StaticAsset for filename, rebuilding it if the file changed."""
+        path = safe_join(self.directory, filename)
+        if path is None or not os.path.isfile(path):
+            raise FileNotFoundError(filename)
+
+        asset = self._assets.get(filename)
+        if (asset is not None and asset.mtime == os.path.getmtime(path)
+                and asset.versions == self._current_versions(asset.versions)):
+            return asset
+
+        with self._lock:
+            with open(path, 'rb') as f:
+                data = f.read()
+
+            # Point pages at fingerprinted asset URLs so those can be cached forever
+            versions = {}
+            if filename.endswith('.html'):
+                data, versions = self._version_references(data)
+
+            asset = StaticAsset(path, data, versions)
+            self._assets[filename] = asset
+            return asset
+
+    def _current_versions(self, versions):
+        """Current hashes of the assets in `versions`, rebuilding any that changed on disk."""
+        current = {}
+        for name in versions:
+            try:
+                current[name] = self.get(name).etag
+            except FileNotFoundError:
+                current[name] = None
+        return current
+
+    def _version_references(self, html):
+        """Rewrite asset references to ?v=<hash> URLs; returns (html, {name: hash})."""
+        versions = {}
+        for name in STATIC_ASSETS:
+            if name.endswith('.html'):
+                continue
+            try:
+                version = self.get(name).etag
+            except FileNotFoundError:
+                versions[name] = None
+                continue
+            versions[name] = version
+            for attr in (b'href', b'src'):
+                html = html.replace(
+                    attr + b'="' + name.encode() + b'"',
+                    attr + b'="' + name.encode() + b'?v=' + version.encode() + b'"',
+                )
+        return html, versions
+
+    def serve(self, filename):
+        """Build a response for filename honoring If-None-Match and Accept-Encoding."""
+        try:
+            asset = self.get(filename)
+        except FileNotFoundError:
+            abort(404)
+
+        if filename.endswith('.html'):
+            cache_control = HTML_CACHE_CONTROL
+        elif request.args.get('v') == asset.etag:
+            cache_control = ASSET_CACHE_CONTROL
+        else:
+            cache_control = UNVERSIONED_CACHE_CONTROL
+
+        encoding = choose_encoding(asset.variants)
+        etag = asset.etag if encoding is None else f"{asset.etag}-{encoding}"
+
+        if etag in request.if_none_match:
+            response = Response(status=304)
+        else:
+            response = Response(asset.variants[encoding], mimetype=asset.mimetype)
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = cache_control
+        response.vary.add('Accept-Encoding')
+        return response
+
+
+def compress_response(response):
+    """
+    after_request hook: compress large API responses if the client accepts it.
+    Static assets are skipped since they're already precompressed.
+    """
+    if (response.direct_passthrough
+            or response.status_code < 200 or response.status_code >= 300
+            or 'Content-Encoding' in response.headers
+            or not (response.mimetype or '').startswith(COMPRESSIBLE_TYPES)):
+        return response
+
+    data = response.get_data()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return response
+
+    encoding = choose_encoding(('br', 'gzip') if brotli is not None else ('gzip',))
+    if encoding is None:
+        return response
+
+    # Favor speed over ratio for per-request compression
+    if encoding == 'br':
+        compressed = brotli.compress(data, quality=4)
+    else:
+        compressed = gzip.compress(data, compresslevel=6)
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
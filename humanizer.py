@@ -3,44 +3,205 @@ NLP-based Text Humanizer
 Implements programmatic techniques to make text appear more human-written.
 """
 
+import hashlib
+import json
 import os
 import random
 import re
+import sys
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
 import nltk
 
-# Set NLTK data path to /tmp for serverless environments (Vercel, AWS Lambda, etc.)
+# Store NLTK data in /tmp for serverless environments (Vercel, AWS Lambda, etc.)
 # /tmp is the only writable directory on these platforms
 NLTK_DATA_DIR = '/tmp/nltk_data'
-if not os.path.exists(NLTK_DATA_DIR):
-    os.makedirs(NLTK_DATA_DIR, exist_ok=True)
-nltk.data.path.insert(0, NLTK_DATA_DIR)
 
-# Download required NLTK data to /tmp
-def ensure_nltk_data():
-    """Download NLTK data if not present."""
-    packages = [
-        ('tokenizers/punkt', 'punkt'),
-        ('tokenizers/punkt_tab', 'punkt_tab'),
-        ('corpora/wordnet', 'wordnet'),
-        ('taggers/averaged_perceptron_tagger', 'averaged_perceptron_tagger'),
-        ('taggers/averaged_perceptron_tagger_eng', 'averaged_perceptron_tagger_eng'),
-    ]
-    
-    for path, package in packages:
+# Guards one-time resource setup (data path, downloads, default engine)
+_RESOURCE_LOCK = threading.RLock()
+_nltk_ready = False
+_nltk_last_attempt = None
+
+# After a failed download, wait this long before trying again
+NLTK_RETRY_SECONDS = 30
+
+# (data path, download package) fetched when missing
+NLTK_PACKAGES = [
+    ('tokenizers/punkt', 'punkt'),
+    ('tokenizers/punkt_tab', 'punkt_tab'),
+    ('corpora/wordnet', 'wordnet'),
+    ('taggers/averaged_perceptron_tagger', 'averaged_perceptron_tagger'),
+    ('taggers/averaged_perceptron_tagger_eng', 'averaged_perceptron_tagger_eng'),
+]
+
+# Resources the engine needs; NLTK 3.9 renamed Punkt and the tagger, so
+# either name satisfies those
+NLTK_REQUIRED = [
+    ('tokenizers/punkt_tab', 'tokenizers/punkt'),
+    ('corpora/wordnet',),
+    ('taggers/averaged_perceptron_tagger_eng', 'taggers/averaged_perceptron_tagger'),
+]
+
+
+class NLPUnavailableError(RuntimeError):
+    """Raised when the NLTK data the NLP engine needs can't be loaded."""
+
+
+def _nltk_data_present(*paths):
+    """True if any of the given NLTK data paths can be found."""
+    for path in paths:
         try:
             nltk.data.find(path)
+            return True
         except LookupError:
-            try:
-                nltk.download(package, download_dir=NLTK_DATA_DIR, quiet=True)
-            except Exception:
-                pass  # Silently continue if download fails
+            continue
+    return False
+
+
+def ensure_nltk_data():
+    """
+    Register the data dir and download NLTK data if not present. Safe to call
+    repeatedly. Returns True once everything is available; after a failed
+    download it returns False and tries again after NLTK_RETRY_SECONDS.
+    """
+    global _nltk_ready, _nltk_last_attempt
+    if _nltk_ready:
+        return True
+    
+    with _RESOURCE_LOCK:
+        if _nltk_ready:
+            return True
+        if _nltk_last_attempt is not None and time.monotonic() - _nltk_last_attempt < NLTK_RETRY_SECONDS:
+            return False
+        _nltk_last_attempt = time.monotonic()
+        
+        os.makedirs(NLTK_DATA_DIR, exist_ok=True)
+        if NLTK_DATA_DIR not in nltk.data.path:
+            nltk.data.path.insert(0, NLTK_DATA_DIR)
+        
+        for path, package in NLTK_PACKAGES:
+            if not _nltk_data_present(path):
+                try:
+                    nltk.download(package, download_dir=NLTK_DATA_DIR, quiet=True)
+                except Exception:
+                    pass  # Checked below
+        
+        missing = [paths[0] for paths in NLTK_REQUIRED if not _nltk_data_present(*paths)]
+        if missing:
+            print(f"NLTK data unavailable ({', '.join(missing)}); retrying in {NLTK_RETRY_SECONDS}s",
+                  file=sys.stderr)
+            return False
+        
+        _nltk_ready = True
+        return True
 
-# Initialize NLTK data
-ensure_nltk_data()
 
 from nltk.corpus import wordnet
 from nltk.tokenize import sent_tokenize, word_tokenize
-from nltk.tag import pos_tag
+from nltk.tag.perceptron import PerceptronTagger
+
+
+# Common abbreviations that end in a period but don't end a sentence
+ABBREVIATIONS = {
+    'mr', 'mrs', 'ms', 'dr', 'prof', 'sr', 'jr', 'st', 'vs', 'etc', 'e.g',
+    'i.e', 'inc', 'ltd', 'co', 'corp', 'no', 'fig', 'approx', 'u.s', 'dept',
+}
+
+# Precompiled patterns for the regex tokenizer backend
+SENTENCE_END_RE = re.compile(r'[.!?]+["\')\]]*(?=\s+["\'(\[]?[A-Z0-9])')
+ABBREVIATION_PATTERN = "|".join(re.escape(a) for a in sorted(ABBREVIATIONS, key=len, reverse=True))
+WORD_RE = re.compile(
+    r"(?:https?://|www\.)\S*[^\s.,;:!?'\")\]]"  # URLs, minus trailing punctuation
+    r"|\d+(?:[.,:]\d+)+"  # 3.5, 10,000, 10:30
+    r"|(?:[A-Za-z]\.){2,}"  # U.S., e.g., i.e.
+    r"|(?i:\b(?:" + ABBREVIATION_PATTERN + r")\.)(?=\s+\S)"  # Dr., etc. (not sentence-final)
+    r"|\w+(?:['\u2019-]\w+)*"
+    r"|[^\w\s]"
+)
+
+
+class Tokenizer:
+    """Base class for sentence/word segmentation backends."""
+
+    name = None
+
+    def sent_tokenize(self, text):
+        raise NotImplementedError
+
+    def word_tokenize(self, text):
+        raise NotImplementedError
+
+
+class NLTKTokenizer(Tokenizer):
+    """Punkt sentences and Treebank words. Accurate, but pure-Python and slow."""
+
+    name = 'nltk'
+
+    def sent_tokenize(self, text):
+        ensure_nltk_data()
+        return sent_tokenize(text)
+
+    def word_tokenize(self, text):
+        ensure_nltk_data()
+        return word_tokenize(text)
+
+
+class RegexTokenizer(Tokenizer):
+    """
+    Fast segmenter built on precompiled regexes.
+    Good enough for sentence boundaries and rough word counts, but doesn't
+    split contractions or handle every abbreviation the way Punkt does.
+    """
+
+    name = 'regex'
+
+    def sent_tokenize(self, text):
+        sentences = []
+        start = 0
+        
+        for match in SENTENCE_END_RE.finditer(text):
+            # Don't break after abbreviations ("Dr. Smith") or initials ("J. Smith")
+            preceding = text[start:match.start()].split()
+            if preceding:
+                last_word = preceding[-1].lower()
+                if last_word in ABBREVIATIONS or (len(last_word) == 1 and last_word.isalpha()):
+                    continue
+            
+            sentence = text[start:match.end()].strip()
+            if sentence:
+                sentences.append(sentence)
+            start = match.end()
+        
+        tail = text[start:].strip()
+        if tail:
+            sentences.append(tail)
+        
+        return sentences
+
+    def word_tokenize(self, text):
+        return WORD_RE.findall(text)
+
+
+TOKENIZERS = {
+    'nltk': NLTKTokenizer(),
+    'regex': RegexTokenizer(),
+}
+
+# Default backend, overridable per deployment
+DEFAULT_TOKENIZER = os.getenv('HUMANIZER_TOKENIZER', 'nltk')
+
+
+def get_tokenizer(name=None):
+    """Look up a tokenizer backend by name (None means the configured default)."""
+    if isinstance(name, Tokenizer):
+        return name
+    
+    name = name or DEFAULT_TOKENIZER
+    if name not in TOKENIZERS:
+        raise ValueError(f"Unknown tokenizer '{name}'. Choose from: {', '.join(TOKENIZERS)}")
+    return TOKENIZERS[name]
 
 
 # Words to avoid replacing (common, important, or structural)
@@ -139,299 +300,698 @@ FILLER_PHRASES = [
 ]
 
 
+# WordNet POS constants (same values as wordnet.ADJ etc., without touching the lazy loader)
+WORDNET_ADJ, WORDNET_VERB, WORDNET_NOUN, WORDNET_ADV = 'a', 'v', 'n', 'r'
+
+# Precompiled contraction patterns, in CONTRACTIONS order
+CONTRACTION_PATTERNS = [
+    (re.compile(re.escape(formal), re.IGNORECASE), contraction)
+    for formal, contraction in CONTRACTIONS.items()
+]
+
+
 def get_wordnet_pos(treebank_tag):
     """Convert treebank POS tag to WordNet POS tag."""
     if treebank_tag.startswith('J'):
-        return wordnet.ADJ
+        return WORDNET_ADJ
     elif treebank_tag.startswith('V'):
-        return wordnet.VERB
+        return WORDNET_VERB
     elif treebank_tag.startswith('N'):
-        return wordnet.NOUN
+        return WORDNET_NOUN
     elif treebank_tag.startswith('R'):
-        return wordnet.ADV
+        return WORDNET_ADV
     else:
         return None
 
 
-def get_synonyms(word, pos=None):
-    """Get synonyms for a word from WordNet."""
-    synonyms = set()
-    
-    for syn in wordnet.synsets(word, pos=pos):
-        for lemma in syn.lemmas():
-            synonym = lemma.name().replace('_', ' ')
-            if synonym.lower() != word.lower() and len(synonym.split()) == 1:
-                synonyms.add(synonym)
-    
-    return list(synonyms)
+# Upper bound on memoized WordNet lookups per lexicon. Keys are arbitrary
+# user words, so the memo would otherwise grow without limit.
+LEXICON_CACHE_ENTRIES = int(os.getenv('HUMANIZER_LEXICON_CACHE_ENTRIES', '50000'))
+
+# The WordNet reader seeks and reads shared file handles that belong to the
+# module-level corpus object, so every lexicon instance shares this lock
+_WORDNET_LOCK = threading.Lock()
 
+# One common word per part of speech, looked up at startup to open each data file
+WORDNET_WARMUP = [('dog', WORDNET_NOUN), ('run', WORDNET_VERB), ('good', WORDNET_ADJ), ('quickly', WORDNET_ADV)]
 
-def synonym_swap(text, swap_rate=0.15):
+
+class WordNetLexicon:
     """
-    Replace some words with synonyms to increase lexical variety.
-    
-    Args:
-        text: Input text
-        swap_rate: Fraction of eligible words to swap (0.0 to 1.0)
+    Synonym source backed by WordNet, with a bounded memo of past lookups.
     
-    Returns:
-        Text with some words replaced by synonyms
+    Cache misses are serialized behind _WORDNET_LOCK; cache hits never take
+    it. Once max_entries is reached the oldest entries are evicted first.
     """
-    sentences = sent_tokenize(text)
-    result_sentences = []
-    
-    for sentence in sentences:
-        words = word_tokenize(sentence)
-        tagged = pos_tag(words)
-        
-        new_words = []
-        for word, tag in tagged:
-            # Skip protected words and short words
-            if word.lower() in PROTECTED_WORDS or len(word) < 4:
-                new_words.append(word)
-                continue
-            
-            # Random chance to swap
-            if random.random() > swap_rate:
-                new_words.append(word)
-                continue
-            
-            # Get WordNet POS
-            wn_pos = get_wordnet_pos(tag)
-            if wn_pos is None:
-                new_words.append(word)
-                continue
-            
-            # Get synonyms
-            synonyms = get_synonyms(word.lower(), wn_pos)
+
+    def __init__(self, max_entries=LEXICON_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._cache = {}
+        
+        with _WORDNET_LOCK:
+            # Touching the lazy loader loads the corpus; a lookup per POS also
+            # opens the data files now rather than on the first request
+            for word, pos in WORDNET_WARMUP:
+                wordnet.synsets(word, pos=pos)
+
+    def synonyms(self, word, pos=None):
+        """Single-word synonyms for word, in WordNet order."""
+        key = (word, pos)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        
+        with _WORDNET_LOCK:
+            synonyms = []
+            for syn in wordnet.synsets(word, pos=pos):
+                for lemma in syn.lemmas():
+                    synonym = lemma.name().replace('_', ' ')
+                    if (synonym.lower() != word.lower() and len(synonym.split()) == 1
+                            and synonym not in synonyms):
+                        synonyms.append(synonym)
             
-            if synonyms:
-                # Pick a random synonym
-                synonym = random.choice(synonyms[:5])  # Limit to top 5 common ones
-                
-                # Preserve capitalization
-                if word[0].isupper():
-                    synonym = synonym.capitalize()
-                if word.isupper():
-                    synonym = synonym.upper()
-                    
-                new_words.append(synonym)
-            else:
-                new_words.append(word)
+            if self.max_entries > 0:
+                while len(self._cache) >= self.max_entries:
+                    del self._cache[next(iter(self._cache))]
+                self._cache[key] = synonyms
         
-        # Reconstruct sentence
-        result = ""
-        for i, word in enumerate(new_words):
-            if i == 0:
-                result = word
-            elif word in '.,!?;:\'")':
-                result += word
-            elif new_words[i-1] in '("\'':
-                result += word
-            else:
-                result += " " + word
-        
-        result_sentences.append(result)
-    
-    return " ".join(result_sentences)
+        return synonyms
 
+    def __len__(self):
+        return len(self._cache)
 
-def add_contractions(text, rate=0.7):
+
+class PrecomputedLexicon:
     """
-    Convert formal word pairs to contractions.
-    
-    Args:
-        text: Input text
-        rate: Probability of converting each instance
-    
-    Returns:
-        Text with contractions added
+    Synonym table loaded from JSON ({"word|pos": [synonyms]}), built offline
+    by build_lexicon.py. Lookups are plain dict reads, with no WordNet access;
+    inflected words only match if the table has an entry for that form.
     """
-    result = text
-    
-    for formal, contraction in CONTRACTIONS.items():
-        if random.random() < rate:
-            # Case-insensitive replacement
-            pattern = re.compile(re.escape(formal), re.IGNORECASE)
-            
-            def replace_match(match):
-                original = match.group(0)
-                if original[0].isupper():
-                    return contraction.capitalize()
-                return contraction
-            
-            result = pattern.sub(replace_match, result)
-    
-    return result
 
+    def __init__(self, path):
+        with open(path, encoding='utf-8') as f:
+            self._table = json.load(f)
+
+    def synonyms(self, word, pos=None):
+        """Precomputed synonyms for word, most common senses first."""
+        return self._table.get(f"{word}|{pos}", [])
+
+    def __len__(self):
+        return len(self._table)
+
+
+# Per-sentence analysis reused across requests. slots[i] is None for words
+# that are never swapped, '' for swappable words with no WordNet POS,
+# UNTAGGED for swappable words not tagged yet (sparse tagging), and the
+# WordNet POS otherwise. tags is None unless the tagger ran.
+SentenceAnalysis = namedtuple('SentenceAnalysis', ['words', 'tags', 'slots'])
+UNTAGGED = '?'
+
+POS_TAGGING_MODES = ('full', 'sparse', 'skip')
+
+# Suffix rules for guessing a WordNet POS without running the tagger
+POS_SUFFIXES = [
+    ('ly', WORDNET_ADV),
+    ('ing', WORDNET_VERB), ('ed', WORDNET_VERB), ('ize', WORDNET_VERB),
+    ('ise', WORDNET_VERB), ('ate', WORDNET_VERB), ('fy', WORDNET_VERB),
+    ('ous', WORDNET_ADJ), ('ful', WORDNET_ADJ), ('ive', WORDNET_ADJ),
+    ('able', WORDNET_ADJ), ('ible', WORDNET_ADJ), ('less', WORDNET_ADJ),
+    ('ical', WORDNET_ADJ), ('ic', WORDNET_ADJ), ('al', WORDNET_ADJ),
+]
+
+# Named performance profiles for the NLP pipeline. Each picks the tokenizer
+# for segmentation and for synonym swapping, how much POS tagging to do,
+# the synonym source, and which stages may run (user options can still
+# turn stages off).
+PROFILES = {
+    'fast': {
+        'tokenizer': 'regex',
+        # Swapped sentences are rebuilt from their tokens, so this stays on
+        # Treebank tokens to keep contractions and punctuation intact
+        'synonym_tokenizer': 'nltk',
+        'pos_tagging': 'skip',
+        # Words are looked up as typed, without lemmatizing. build_lexicon.py
+        # adds noun plurals and verb -s/-ed/-ing forms, but not adjective
+        # comparatives or irregular pasts (ran, went), so those are never swapped
+        'lexicon': 'precomputed',
+        'stages': ('synonyms', 'contractions', 'informal', 'casual_starters'),
+    },
+    'balanced': {
+        'tokenizer': 'regex',
+        'synonym_tokenizer': 'nltk',
+        'pos_tagging': 'sparse',
+        'lexicon': 'wordnet',
+        'stages': ('synonyms', 'contractions', 'vary_length', 'informal', 'casual_starters'),
+    },
+    'thorough': {
+        'tokenizer': 'nltk',
+        'synonym_tokenizer': 'nltk',
+        'pos_tagging': 'full',
+        'lexicon': 'wordnet',
+        'stages': ('synonyms', 'contractions', 'vary_length', 'informal', 'casual_starters'),
+    },
+}
+
+# Profile used when a request doesn't name one (empty means none)
+DEFAULT_PROFILE = os.getenv('HUMANIZER_PROFILE', '')
 
-def vary_sentence_length(text):
+# Synonym table written by build_lexicon.py, used by the 'precomputed' lexicon
+LEXICON_PATH = os.getenv('HUMANIZER_LEXICON', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lexicon.json'))
+
+
+def guess_wordnet_pos(word):
+    """Guess a WordNet POS from the word's suffix (nouns by default)."""
+    word = word.lower()
+    for suffix, pos in POS_SUFFIXES:
+        if word.endswith(suffix) and len(word) > len(suffix) + 2:
+            return pos
+    return WORDNET_NOUN
+
+# Memory budget for the analysis cache (approximate bytes)
+SENTENCE_CACHE_BYTES = int(os.getenv('HUMANIZER_SENTENCE_CACHE_BYTES', str(32 * 1024 * 1024)))
+
+# Separate, smaller budget for whole-paragraph sentence splits, so large
+# pasted documents can't evict the per-sentence analyses
+SEGMENT_CACHE_BYTES = int(os.getenv('HUMANIZER_SEGMENT_CACHE_BYTES', str(8 * 1024 * 1024)))
+
+
+def estimate_size(value):
+    """Rough deep size in bytes of strings and nested tuples/lists."""
+    size = sys.getsizeof(value)
+    if isinstance(value, (tuple, list)):
+        size += sum(estimate_size(item) for item in value)
+    return size
+
+
+class AnalysisCache:
     """
-    Add variation to sentence lengths for burstiness.
-    Occasionally splits long sentences or combines short ones.
+    Thread-safe LRU cache bounded by the approximate size of its values
+    rather than entry count, so long sentences can't crowd out memory.
     """
-    sentences = sent_tokenize(text)
-    result = []
-    i = 0
+
+    def __init__(self, max_bytes=SENTENCE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(*parts):
+        """Compact hash key for the given strings."""
+        return hashlib.blake2b('\x00'.join(parts).encode('utf-8'), digest_size=16).digest()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+            self._entries[key] = (value, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+def get_profile(name=None):
+    """Look up a performance profile by name (None means the configured default, if any)."""
+    name = name or DEFAULT_PROFILE
+    if not name:
+        return {}
+    if name not in PROFILES:
+        raise ValueError(f"Unknown profile '{name}'. Choose from: {', '.join(PROFILES)}")
+    return PROFILES[name]
+
+
+class Humanizer:
+    """
+    NLP humanization engine.
     
-    while i < len(sentences):
-        sentence = sentences[i]
-        words = word_tokenize(sentence)
-        
-        # Long sentence - maybe split it
-        if len(words) > 25 and random.random() < 0.3:
-            # Look for a good split point (comma, semicolon, or conjunction)
-            split_points = []
-            for j, word in enumerate(words):
-                if word in [',', ';'] and 8 < j < len(words) - 8:
-                    split_points.append(j)
-                elif word.lower() in ['and', 'but', 'so', 'yet'] and 8 < j < len(words) - 5:
-                    split_points.append(j - 1)
+    Holds its own RNG, tokenizer, POS tagger and lexicon. Everything is loaded
+    in __init__, and nothing is mutated per call except the RNG and caches,
+    so a single instance can be shared across request threads.
+    """
+
+    def __init__(self, seed=None, tokenizer=None, cache_bytes=SENTENCE_CACHE_BYTES,
+                 lexicon_path=LEXICON_PATH, segment_cache_bytes=SEGMENT_CACHE_BYTES):
+        if not ensure_nltk_data():
+            raise NLPUnavailableError("NLP engine unavailable: required NLTK data could not be downloaded")
+        
+        self.rng = random.Random(seed)
+        self.tokenizer = get_tokenizer(tokenizer)
+        try:
+            self.lexicon = WordNetLexicon()
+            self.tagger = PerceptronTagger()
+            # Warm up Punkt so the first request doesn't pay for loading it
+            TOKENIZERS['nltk'].word_tokenize("Warm up.")
+        except LookupError as e:
+            raise NLPUnavailableError("NLP engine unavailable: NLTK data failed to load") from e
+        
+        self.lexicons = {'wordnet': self.lexicon, 'precomputed': self.lexicon}
+        # What each lexicon name actually resolves to, for stats and benchmarks
+        self.lexicon_sources = {'wordnet': 'wordnet', 'precomputed': 'wordnet (fallback)'}
+        if os.path.exists(lexicon_path):
+            self.lexicons['precomputed'] = PrecomputedLexicon(lexicon_path)
+            self.lexicon_sources['precomputed'] = 'precomputed'
+        else:
+            print(f"WARNING: no precomputed lexicon at {lexicon_path}; the 'precomputed' lexicon "
+                  f"(fast profile) falls back to WordNet. Run build_lexicon.py to create it.",
+                  file=sys.stderr)
+        self.analysis_cache = AnalysisCache(cache_bytes)
+        self.segment_cache = AnalysisCache(segment_cache_bytes)
+
+    def synonym_swap(self, text, swap_rate=0.15, tokenizer='nltk', rng=None,
+                     pos_tagging='full', lexicon='wordnet'):
+        """
+        Replace some words with synonyms to increase lexical variety.
+        
+        Args:
+            text: Input text
+            swap_rate: Fraction of eligible words to swap (0.0 to 1.0)
+            tokenizer: Tokenizer backend name. Defaults to NLTK since POS tagging
+                expects Treebank tokens.
+            rng: Random instance to use instead of the engine's
+            pos_tagging: 'full' tags every sentence, 'sparse' only sentences
+                where a word is picked for swapping, 'skip' guesses POS from suffixes
+            lexicon: Synonym source, 'wordnet' or 'precomputed'
+        
+        Returns:
+            Text with some words replaced by synonyms
+        """
+        rng = rng or self.rng
+        tokenizer = get_tokenizer(tokenizer)
+        synonym_source = self.lexicons[lexicon]
+        sentences = self.split_sentences(text, tokenizer)
+        result_sentences = []
+        
+        for sentence in sentences:
+            analysis = self.analyze_sentence(sentence, tokenizer, pos_tagging)
+            tagged = None
             
-            if split_points:
-                split_at = random.choice(split_points)
-                first_part = words[:split_at + 1]
-                second_part = words[split_at + 1:]
+            new_words = []
+            for i, (word, wn_pos) in enumerate(zip(analysis.words, analysis.slots)):
+                # Skip protected words and short words
+                if wn_pos is None:
+                    new_words.append(word)
+                    continue
                 
-                # Clean up
-                if first_part[-1] == ',':
-                    first_part[-1] = '.'
-                if second_part and second_part[0].lower() in ['and', 'but', 'so']:
-                    second_part[0] = second_part[0].capitalize()
-                elif second_part:
-                    second_part[0] = second_part[0].capitalize()
+                # Random chance to swap
+                if rng.random() > swap_rate:
+                    new_words.append(word)
+                    continue
                 
-                result.append(" ".join(first_part))
-                result.append(" ".join(second_part))
-                i += 1
-                continue
-        
-        # Short consecutive sentences - maybe combine them
-        if len(words) < 10 and i + 1 < len(sentences):
-            next_sentence = sentences[i + 1]
-            next_words = word_tokenize(next_sentence)
-            
-            if len(next_words) < 12 and random.random() < 0.25:
-                # Combine with a connector
-                connectors = [" — ", ", and ", "; ", " — plus, "]
-                connector = random.choice(connectors)
+                # Sparse tagging: tag the sentence once a word in it is picked
+                if wn_pos == UNTAGGED:
+                    tagged = tagged or self.analyze_sentence(sentence, tokenizer)
+                    wn_pos = tagged.slots[i]
                 
-                # Remove period from first sentence
-                if sentence.rstrip().endswith('.'):
-                    sentence = sentence.rstrip()[:-1]
+                # No WordNet POS for this word
+                if not wn_pos:
+                    new_words.append(word)
+                    continue
                 
-                # Lowercase the start of next sentence
-                next_sentence = next_sentence[0].lower() + next_sentence[1:]
+                # Get synonyms
+                synonyms = synonym_source.synonyms(word.lower(), wn_pos)
                 
-                combined = sentence + connector + next_sentence
-                result.append(combined)
-                i += 2
-                continue
+                if synonyms:
+                    # Pick a random synonym
+                    synonym = rng.choice(synonyms[:5])  # Limit to top 5 common ones
+                    
+                    # Preserve capitalization
+                    if word[0].isupper():
+                        synonym = synonym.capitalize()
+                    if word.isupper():
+                        synonym = synonym.upper()
+                        
+                    new_words.append(synonym)
+                else:
+                    new_words.append(word)
+            
+            # Reconstruct sentence
+            result = ""
+            for i, word in enumerate(new_words):
+                if i == 0:
+                    result = word
+                elif word in '.,!?;:\'")':
+                    result += word
+                elif new_words[i-1] in '("\'':
+                    result += word
+                else:
+                    result += " " + word
+            
+            result_sentences.append(result)
         
-        result.append(sentence)
-        i += 1
-    
-    return " ".join(result)
+        return " ".join(result_sentences)
 
+    def split_sentences(self, text, tokenizer):
+        """Sentence-split text, reusing the result for text seen before."""
+        key = AnalysisCache.key(tokenizer.name, text)
+        sentences = self.segment_cache.get(key)
+        if sentences is None:
+            sentences = tuple(tokenizer.sent_tokenize(text))
+            self.segment_cache.put(key, sentences)
+        return sentences
 
-def inject_informal_elements(text, rate=0.1):
-    """
-    Add informal transitions and filler words occasionally.
-    """
-    sentences = sent_tokenize(text)
-    result = []
-    
-    for i, sentence in enumerate(sentences):
-        # Skip first sentence
-        if i == 0:
-            result.append(sentence)
-            continue
+    def analyze_sentence(self, sentence, tokenizer, pos_tagging='full'):
+        """
+        Tokenize and POS-tag a sentence and mark which words are synonym
+        candidates. Cached, so repeated sentences skip the tokenizer and tagger.
+        With pos_tagging 'sparse' the tagger isn't run; 'skip' guesses POS
+        from suffixes instead.
+        """
+        key = AnalysisCache.key('analysis', tokenizer.name, pos_tagging, sentence)
+        analysis = self.analysis_cache.get(key)
+        if analysis is not None:
+            return analysis
         
-        # Maybe add informal transition at the start
-        if random.random() < rate and not sentence.startswith(tuple(INFORMAL_TRANSITIONS)):
-            transition = random.choice(INFORMAL_TRANSITIONS)
-            # Lowercase the first letter of the original sentence
-            sentence = transition + sentence[0].lower() + sentence[1:]
-        
-        # Maybe add a filler phrase
-        elif random.random() < rate * 0.5:
-            words = sentence.split()
-            if len(words) > 5:
-                # Insert filler after 2-4 words
-                insert_pos = random.randint(2, min(4, len(words) - 2))
-                filler = random.choice(FILLER_PHRASES)
-                words.insert(insert_pos, filler)
-                sentence = " ".join(words)
-        
-        result.append(sentence)
-    
-    return " ".join(result)
+        words = tokenizer.word_tokenize(sentence)
+        tags = None
+        eligible = [word.lower() not in PROTECTED_WORDS and len(word) >= 4 for word in words]
+        
+        if pos_tagging == 'full':
+            tags = tuple(tag for _, tag in self.tagger.tag(words))
+            slots = tuple(
+                (get_wordnet_pos(tag) or '') if ok else None
+                for ok, tag in zip(eligible, tags)
+            )
+        elif pos_tagging == 'sparse':
+            slots = tuple(UNTAGGED if ok else None for ok in eligible)
+        else:
+            slots = tuple(
+                guess_wordnet_pos(word) if ok else None
+                for ok, word in zip(eligible, words)
+            )
+        
+        analysis = SentenceAnalysis(tuple(words), tags, slots)
+        self.analysis_cache.put(key, analysis)
+        return analysis
 
+    def cache_stats(self):
+        """Sizes and hit rates of the engine's caches."""
+        return {
+            'analysis': self.analysis_cache.stats(),
+            'segments': self.segment_cache.stats(),
+            'lexicon': {'entries': len(self.lexicon)},
+            'lexicons': dict(self.lexicon_sources),
+        }
 
-def add_sentence_starters(text, rate=0.08):
-    """
-    Occasionally start sentences with 'And' or 'But' for a more casual feel.
-    """
-    sentences = sent_tokenize(text)
-    result = []
-    starters = ['And ', 'But ', 'So ', 'Now, ']
-    
-    for i, sentence in enumerate(sentences):
-        # Skip first couple sentences
-        if i < 2:
+    def add_contractions(self, text, rate=0.7, rng=None):
+        """
+        Convert formal word pairs to contractions.
+        
+        Args:
+            text: Input text
+            rate: Probability of converting each instance
+            rng: Random instance to use instead of the engine's
+        
+        Returns:
+            Text with contractions added
+        """
+        rng = rng or self.rng
+        result = text
+        
+        for pattern, contraction in CONTRACTION_PATTERNS:
+            if rng.random() < rate:
+                # Case-insensitive replacement
+                def replace_match(match, contraction=contraction):
+                    original = match.group(0)
+                    if original[0].isupper():
+                        return contraction.capitalize()
+                    return contraction
+                
+                result = pattern.sub(replace_match, result)
+        
+        return result
+
+    def vary_sentence_length(self, text, tokenizer=None, rng=None):
+        """
+        Add variation to sentence lengths for burstiness.
+        Occasionally splits long sentences or combines short ones.
+        """
+        rng = rng or self.rng
+        tokenizer = get_tokenizer(tokenizer or self.tokenizer)
+        sentences = tokenizer.sent_tokenize(text)
+        result = []
+        i = 0
+        
+        while i < len(sentences):
+            sentence = sentences[i]
+            words = tokenizer.word_tokenize(sentence)
+            
+            # Long sentence - maybe split it
+            if len(words) > 25 and rng.random() < 0.3:
+                # Look for a good split point (comma, semicolon, or conjunction)
+                split_points = []
+                for j, word in enumerate(words):
+                    if word in [',', ';'] and 8 < j < len(words) - 8:
+                        split_points.append(j)
+                    elif word.lower() in ['and', 'but', 'so', 'yet'] and 8 < j < len(words) - 5:
+                        split_points.append(j - 1)
+                
+                if split_points:
+                    split_at = rng.choice(split_points)
+                    first_part = words[:split_at + 1]
+                    second_part = words[split_at + 1:]
+                    
+                    # Clean up
+                    if first_part[-1] == ',':
+                        first_part[-1] = '.'
+                    if second_part and second_part[0].lower() in ['and', 'but', 'so']:
+                        second_part[0] = second_part[0].capitalize()
+                    elif second_part:
+                        second_part[0] = second_part[0].capitalize()
+                    
+                    result.append(" ".join(first_part))
+                    result.append(" ".join(second_part))
+                    i += 1
+                    continue
+            
+            # Short consecutive sentences - maybe combine them
+            if len(words) < 10 and i + 1 < len(sentences):
+                next_sentence = sentences[i + 1]
+                next_words = tokenizer.word_tokenize(next_sentence)
+                
+                if len(next_words) < 12 and rng.random() < 0.25:
+                    # Combine with a connector
+                    connectors = [" — ", ", and ", "; ", " — plus, "]
+                    connector = rng.choice(connectors)
+                    
+                    # Remove period from first sentence
+                    if sentence.rstrip().endswith('.'):
+                        sentence = sentence.rstrip()[:-1]
+                    
+                    # Lowercase the start of next sentence
+                    next_sentence = next_sentence[0].lower() + next_sentence[1:]
+                    
+                    combined = sentence + connector + next_sentence
+                    result.append(combined)
+                    i += 2
+                    continue
+            
+            result.append(sentence)
+            i += 1
+        
+        return " ".join(result)
+
+    def inject_informal_elements(self, text, rate=0.1, tokenizer=None, rng=None):
+        """
+        Add informal transitions and filler words occasionally.
+        """
+        rng = rng or self.rng
+        sentences = get_tokenizer(tokenizer or self.tokenizer).sent_tokenize(text)
+        result = []
+        
+        for i, sentence in enumerate(sentences):
+            # Skip first sentence
+            if i == 0:
+                result.append(sentence)
+                continue
+            
+            # Maybe add informal transition at the start
+            if rng.random() < rate and not sentence.startswith(tuple(INFORMAL_TRANSITIONS)):
+                transition = rng.choice(INFORMAL_TRANSITIONS)
+                # Lowercase the first letter of the original sentence
+                sentence = transition + sentence[0].lower() + sentence[1:]
+            
+            # Maybe add a filler phrase
+            elif rng.random() < rate * 0.5:
+                words = sentence.split()
+                if len(words) > 5:
+                    # Insert filler after 2-4 words
+                    insert_pos = rng.randint(2, min(4, len(words) - 2))
+                    filler = rng.choice(FILLER_PHRASES)
+                    words.insert(insert_pos, filler)
+                    sentence = " ".join(words)
+            
             result.append(sentence)
-            continue
         
-        # Check if sentence already starts with these
-        first_word = sentence.split()[0].lower() if sentence.split() else ""
-        if first_word in ['and', 'but', 'so', 'now', 'however', 'therefore']:
+        return " ".join(result)
+
+    def add_sentence_starters(self, text, rate=0.08, tokenizer=None, rng=None):
+        """
+        Occasionally start sentences with 'And' or 'But' for a more casual feel.
+        """
+        rng = rng or self.rng
+        sentences = get_tokenizer(tokenizer or self.tokenizer).sent_tokenize(text)
+        result = []
+        starters = ['And ', 'But ', 'So ', 'Now, ']
+        
+        for i, sentence in enumerate(sentences):
+            # Skip first couple sentences
+            if i < 2:
+                result.append(sentence)
+                continue
+            
+            # Check if sentence already starts with these
+            first_word = sentence.split()[0].lower() if sentence.split() else ""
+            if first_word in ['and', 'but', 'so', 'now', 'however', 'therefore']:
+                result.append(sentence)
+                continue
+            
+            if rng.random() < rate:
+                starter = rng.choice(starters)
+                sentence = starter + sentence[0].lower() + sentence[1:]
+            
             result.append(sentence)
-            continue
         
-        if random.random() < rate:
-            starter = random.choice(starters)
-            sentence = starter + sentence[0].lower() + sentence[1:]
+        return " ".join(result)
+
+    def humanize_text(self, text, options=None):
+        """
+        Apply all NLP humanization techniques to the text.
         
-        result.append(sentence)
-    
-    return " ".join(result)
+        Args:
+            text: Input text to humanize
+            options: Dict of options to control which techniques to apply.
+                'profile' names a PROFILES entry supplying defaults for
+                'tokenizer' (segmentation-only stages), 'synonym_tokenizer',
+                'pos_tagging' and 'lexicon', and limiting which stages run.
+                'seed' makes the run reproducible with a private RNG.
+        
+        Returns:
+            Humanized text
+        """
+        if options is None:
+            options = {}
+        
+        # Profile settings fill in whatever the options leave unset
+        profile = get_profile(options.get('profile'))
+        
+        def setting(name, default=None):
+            if options.get(name) is not None:
+                return options[name]
+            return profile.get(name, default)
+        
+        def enabled(stage):
+            return options.get(stage, True) and stage in profile.get('stages', (stage,))
+        
+        result = text
+        tokenizer = get_tokenizer(setting('tokenizer') or self.tokenizer)
+        
+        # A seeded run gets its own RNG so other threads can't perturb it
+        rng = random.Random(options['seed']) if options.get('seed') is not None else self.rng
+        
+        # Apply techniques based on options
+        if enabled('synonyms'):
+            swap_rate = options.get('synonym_rate', 0.15)
+            result = self.synonym_swap(
+                result, swap_rate, setting('synonym_tokenizer', 'nltk'), rng=rng,
+                pos_tagging=setting('pos_tagging', 'full'), lexicon=setting('lexicon', 'wordnet'),
+            )
+        
+        if enabled('contractions'):
+            result = self.add_contractions(result, rng=rng)
+        
+        if enabled('vary_length'):
+            result = self.vary_sentence_length(result, tokenizer, rng=rng)
+        
+        if enabled('informal'):
+            rate = options.get('informal_rate', 0.1)
+            result = self.inject_informal_elements(result, rate, tokenizer, rng=rng)
+        
+        if enabled('casual_starters'):
+            result = self.add_sentence_starters(result, tokenizer=tokenizer, rng=rng)
+        
+        return result
 
 
-def humanize_text(text, options=None):
+# Shared engine behind the module-level functions
+_default_engine = None
+
+
+def get_default_engine():
     """
-    Apply all NLP humanization techniques to the text.
-    
-    Args:
-        text: Input text to humanize
-        options: Dict of options to control which techniques to apply
-    
-    Returns:
-        Humanized text
+    Return the process-wide Humanizer, creating it on first use. Raises
+    NLPUnavailableError if the NLTK data can't be loaded; the next call retries.
     """
-    if options is None:
-        options = {}
-    
-    result = text
-    
-    # Apply techniques based on options
-    if options.get('synonyms', True):
-        swap_rate = options.get('synonym_rate', 0.15)
-        result = synonym_swap(result, swap_rate)
-    
-    if options.get('contractions', True):
-        result = add_contractions(result)
-    
-    if options.get('vary_length', True):
-        result = vary_sentence_length(result)
-    
-    if options.get('informal', True):
-        rate = options.get('informal_rate', 0.1)
-        result = inject_informal_elements(result, rate)
-    
-    if options.get('casual_starters', True):
-        result = add_sentence_starters(result)
-    
-    return result
+    global _default_engine
+    if _default_engine is None:
+        with _RESOURCE_LOCK:
+            if _default_engine is None:
+                _default_engine = Humanizer()
+    return _default_engine
+
+
+def get_synonyms(word, pos=None):
+    """Get synonyms for a word from WordNet."""
+    return list(get_default_engine().lexicon.synonyms(word, pos))
+
+
+def synonym_swap(text, swap_rate=0.15, tokenizer='nltk'):
+    """Replace some words with synonyms using the default engine."""
+    return get_default_engine().synonym_swap(text, swap_rate, tokenizer)
+
+
+def add_contractions(text, rate=0.7):
+    """Convert formal word pairs to contractions using the default engine."""
+    return get_default_engine().add_contractions(text, rate)
+
+
+def vary_sentence_length(text, tokenizer=None):
+    """Vary sentence lengths using the default engine."""
+    return get_default_engine().vary_sentence_length(text, tokenizer)
+
+
+def inject_informal_elements(text, rate=0.1, tokenizer=None):
+    """Add informal transitions and fillers using the default engine."""
+    return get_default_engine().inject_informal_elements(text, rate, tokenizer)
+
+
+def add_sentence_starters(text, rate=0.08, tokenizer=None):
+    """Add casual sentence starters using the default engine."""
+    return get_default_engine().add_sentence_starters(text, rate, tokenizer)
+
+
+def humanize_text(text, options=None):
+    """Apply all NLP humanization techniques using the default engine."""
+    return get_default_engine().humanize_text(text, options)
 
 
 if __name__ == "__main__":
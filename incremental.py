@@ -0,0 +1,141 @@
+"""
+Incremental Re-humanization
+Remembers per-paragraph outputs for each document so that resubmitting an
+edited document only reprocesses the paragraphs that changed.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
+
+
+PARAGRAPH_SPLIT_RE = re.compile(r'\n\s*\n')
+
+# Approximate memory budget for remembered documents across all users
+DOCUMENT_CACHE_BYTES = int(os.getenv('DOCUMENT_CACHE_BYTES', str(64 * 1024 * 1024)))
+
+
+def split_paragraphs(text):
+    """Split text on blank lines, dropping empty paragraphs."""
+    return [p.strip() for p in PARAGRAPH_SPLIT_RE.split(text) if p.strip()]
+
+
+def paragraph_hash(paragraph):
+    """Content hash for a paragraph."""
+    return hashlib.sha256(paragraph.encode('utf-8')).hexdigest()
+
+
+def settings_key(mode, intensity, options):
+    """Fingerprint of everything besides the text that affects the output."""
+    return json.dumps([mode, intensity, options], sort_keys=True)
+
+
+def entry_size(settings, outputs):
+    """Rough size in bytes of one cached document."""
+    return sys.getsizeof(settings) + sum(sys.getsizeof(h) + sys.getsizeof(o) for h, o in outputs.items())
+
+
+class DocumentCache:
+    """
+    LRU map of (user id, document id) to the paragraph outputs of the last
+    submission, bounded by the approximate size of those outputs.
+    """
+
+    def __init__(self, max_bytes=DOCUMENT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._documents = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, document_id, settings):
+        """Cached {paragraph hash: output} for the document, or {} if the settings changed."""
+        key = (user_id, document_id)
+        with self._lock:
+            entry = self._documents.get(key)
+            if entry is None:
+                return {}
+            self._documents.move_to_end(key)
+
+        cached_settings, outputs, _ = entry
+        return dict(outputs) if cached_settings == settings else {}
+
+    def covers(self, user_id, document_id, settings, text):
+        """True if every paragraph of text has a cached output under these settings."""
+        with self._lock:
+            entry = self._documents.get((user_id, document_id))
+        if entry is None or entry[0] != settings:
+            return False
+        outputs = entry[1]
+        return all(paragraph_hash(p) in outputs for p in split_paragraphs(text))
+
+    def put(self, user_id, document_id, settings, outputs):
+        key = (user_id, document_id)
+        size = entry_size(settings, outputs)
+        with self._lock:
+            old = self._documents.pop(key, None)
+            if old is not None:
+                self.size -= old[2]
+            if size > self.max_bytes:
+                return
+            self._documents[key] = (settings, outputs, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, _, evicted_size) = self._documents.popitem(last=False)
+                self.size -= evicted_size
+
+    def stats(self):
+        with self._lock:
+            return {'documents': len(self._documents), 'bytes': self.size, 'max_bytes': self.max_bytes}
+
+
+def humanize_incremental(text, process, cached):
+    """
+    Humanize text paragraph by paragraph, reusing cached outputs.
+
+    Consecutive changed paragraphs are sent to `process` together, so a
+    fresh document still costs one call. A run's output is only cached
+    per paragraph when it has the same number of paragraphs as its input;
+    otherwise it's used as-is and reprocessed next time.
+
+    Args:
+        text: Full document text
+        process: Function that humanizes a chunk of text
+        cached: {paragraph hash: output} from the previous submission
+
+    Returns:
+        (humanized text, new {paragraph hash: output}, reused count, processed count)
+    """
+    paragraphs = split_paragraphs(text)
+    hashes = [paragraph_hash(p) for p in paragraphs]
+    outputs = {}
+    pieces = []
+    reused = processed = 0
+
+    i = 0
+    while i < len(paragraphs):
+        if hashes[i] in cached:
+            outputs[hashes[i]] = cached[hashes[i]]
+            pieces.append(cached[hashes[i]])
+            reused += 1
+            i += 1
+            continue
+
+        # Collect the run of changed paragraphs starting here
+        j = i
+        while j < len(paragraphs) and hashes[j] not in cached:
+            j += 1
+
+        result = process("\n\n".join(paragraphs[i:j]))
+        result_paragraphs = split_paragraphs(result)
+        if len(result_paragraphs) == j - i:
+            outputs.update(zip(hashes[i:j], result_paragraphs))
+
+        pieces.append(result.strip())
+        processed += j - i
+        i = j
+
+    return "\n\n".join(pieces), outputs, reused, processed
@@ -0,0 +1,111 @@
+"""
+Request Metrics Log
+Appends one JSON line per request to a size-rotated local log. Records are
+handed to a background thread, so logging never blocks a request.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+
+# Rotate when the active file passes this size; keep this many old files
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUPS = 5
+
+
+@contextmanager
+def timed(timings, name):
+    """Add the elapsed milliseconds of the block to timings[name]."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+
+class MetricsWriter:
+    """
+    Background JSONL writer with size-based rotation (log, log.1, log.2, ...).
+    When the queue is full, records are dropped and counted rather than
+    making the caller wait.
+    """
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES, backups=DEFAULT_BACKUPS, queue_size=10000):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name='metrics-writer', daemon=True)
+        self._thread.start()
+
+    def record(self, entry):
+        """Queue a record for writing. Never blocks."""
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout=5):
+        """Wait until everything queued so far is on disk."""
+        done = threading.Event()
+        self._queue.put(done, timeout=timeout)
+        done.wait(timeout)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            # Drain whatever else is waiting so bursts become one write
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            records = [entry for entry in batch if not isinstance(entry, threading.Event)]
+            if records:
+                try:
+                    self._write(records)
+                except Exception as e:  # Keep the thread alive whatever happens
+                    print(f"Error writing metrics: {e}")
+
+            for entry in batch:
+                if isinstance(entry, threading.Event):
+                    entry.set()
+
+    def _write(self, records):
+        lines = "".join(json.dumps(r, separators=(',', ':'), default=str) + "\n" for r in records)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(lines)
+            size = f.tell()
+
+        if size >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+
+def create_metrics_writer():
+    """Build the writer from environment variables, or None if METRICS_LOG is empty."""
+    path = os.getenv('METRICS_LOG', '/tmp/humanizer_metrics.jsonl')
+    if not path:
+        return None
+
+    return MetricsWriter(
+        path,
+        max_bytes=int(os.getenv('METRICS_MAX_BYTES', str(DEFAULT_MAX_BYTES))),
+        backups=int(os.getenv('METRICS_BACKUPS', str(DEFAULT_BACKUPS))),
+    )
@@ -0,0 +1,97 @@
+"""
+Mock Cerebras API Server
+Local stand-in for the chat completions endpoint with injectable latency
+and errors, for exercising hedging and the circuit breaker.
+
+Usage:
+    python mock_cerebras.py --port 8085 --latency 0.2 --slow-rate 0.05 --slow-latency 5
+    CEREBRAS_API_URL=http://localhost:8085/v1/chat/completions python app.py
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockConfig:
+    """Latency and failure injection settings shared by all handlers."""
+
+    def __init__(self, latency=0.2, jitter=0.05, slow_rate=0.0, slow_latency=5.0, error_rate=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.error_rate = error_rate
+
+    def delay(self):
+        if random.random() < self.slow_rate:
+            return self.slow_latency
+        return max(0.0, random.gauss(self.latency, self.jitter))
+
+
+def make_handler(config):
+    class MockHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length) or b'{}')
+
+            time.sleep(config.delay())
+
+            if random.random() < config.error_rate:
+                self.send_response(503)
+                self.end_headers()
+                return
+
+            # Echo the quoted text from the last user message
+            content = payload.get('messages', [{}])[-1].get('content', '')
+            if '"""' in content:
+                content = content.split('"""')[1].strip()
+
+            body = json.dumps({
+                'choices': [{'message': {'role': 'assistant', 'content': content}}],
+                'usage': {
+                    'prompt_tokens': sum(len(m.get('content', '')) // 4 for m in payload.get('messages', [])),
+                    'completion_tokens': len(content) // 4,
+                },
+            }).encode('utf-8')
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Keep benchmark output clean
+
+    return MockHandler
+
+
+def start_mock_server(config, port=0):
+    """Start the mock in a background thread. Returns (server, chat completions URL)."""
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(config))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/v1/chat/completions"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock Cerebras API server")
+    parser.add_argument('--port', type=int, default=8085)
+    parser.add_argument('--latency', type=float, default=0.2, help="Typical response time (s)")
+    parser.add_argument('--jitter', type=float, default=0.05)
+    parser.add_argument('--slow-rate', type=float, default=0.0, help="Fraction of very slow responses")
+    parser.add_argument('--slow-latency', type=float, default=5.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    config = MockConfig(args.latency, args.jitter, args.slow_rate, args.slow_latency, args.error_rate)
+    server, url = start_mock_server(config, args.port)
+    print(f"Mock Cerebras API listening at {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
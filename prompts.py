@@ -0,0 +1,195 @@
+"""
+Prompt Building for Cerebras Calls
+Picks full or compact system prompts by intensity and token budget,
+estimates prompt size locally, and tracks token usage per request.
+"""
+
+import math
+import os
+import threading
+
+
+FULL_SYSTEM_PROMPT = """You are an expert text humanizer. Your job is to rewrite AI-generated text to make it sound naturally human-written while preserving the original meaning.
+
+Apply these humanization techniques:
+
+1. **Sentence Variation**: Mix short, punchy sentences with longer, flowing ones. Humans don't write uniformly.
+
+2. **Contractions**: Use contractions naturally (don't, it's, we're, they've). AI tends to avoid them.
+
+3. **Informal Transitions**: Use casual connectors like "Plus," "Thing is," "Here's the deal," "Look," occasionally.
+
+4. **Natural Redundancies**: Humans sometimes restate things slightly differently for emphasis.
+
+5. **Conversational Tone**: Add occasional personal touches, rhetorical questions, or asides.
+
+6. **Imperfect Structure**: Start some sentences with "And" or "But". Use fragments occasionally.
+
+7. **Active Voice**: Prefer active voice but mix in passive occasionally for variety.
+
+8. **Idiomatic Expressions**: Sprinkle in common idioms and colloquialisms where appropriate.
+
+9. **Varied Paragraph Lengths**: Some paragraphs can be just one sentence. Others longer.
+
+10. **Reduce Formality**: Avoid overly formal constructions that sound robotic.
+
+IMPORTANT RULES:
+- Keep the core meaning and information intact
+- Don't add new facts or claims
+- Don't make it too casual if the original is academic/professional
+- Match the general tone but make it feel human
+- Output ONLY the rewritten text, no explanations or meta-commentary"""
+
+COMPACT_SYSTEM_PROMPT = """Rewrite AI-generated text so it reads as naturally human-written. Vary sentence length, use contractions and occasional casual transitions, prefer active voice, and avoid robotic formality.
+
+Rules: keep the meaning, add no new facts, match the original's register, and output ONLY the rewritten text."""
+
+# Appended to the system prompt for single-call humanize+polish
+POLISH_INSTRUCTION = """
+
+Before answering, proofread your rewrite: fix awkward phrasing and keep it readable."""
+
+POLISH_SYSTEM_PROMPT = "You are a text editor. Make minimal corrections for readability. Output only the polished text."
+
+INTENSITY_PROMPTS = {
+    "light": "Make subtle changes to sound more natural. Keep most of the original structure.",
+    "medium": "Rewrite to sound genuinely human while keeping the meaning. Apply moderate changes.",
+    "heavy": "Significantly rewrite to sound completely human-written. Be creative with structure and phrasing."
+}
+
+# Which system prompt each intensity gets when PROMPT_VARIANT=auto. Light and
+# medium rewrites follow the compact rules just as well.
+INTENSITY_VARIANTS = {
+    "light": "compact",
+    "medium": "compact",
+    "heavy": "full",
+}
+
+SYSTEM_PROMPTS = {
+    "full": FULL_SYSTEM_PROMPT,
+    "compact": COMPACT_SYSTEM_PROMPT,
+}
+
+PROMPT_VARIANT = os.getenv("PROMPT_VARIANT", "auto")
+
+# Above this estimated prompt size, always use the compact system prompt
+MAX_PROMPT_TOKENS = int(os.getenv("MAX_PROMPT_TOKENS", "6000"))
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token for English)."""
+    return math.ceil(len(text) / 4)
+
+
+def quote(text):
+    return f'"""\n{text}\n"""'
+
+
+def choose_variant(intensity, text_tokens):
+    """Pick the system prompt variant for an intensity and document size."""
+    if PROMPT_VARIANT in SYSTEM_PROMPTS:
+        variant = PROMPT_VARIANT
+    else:
+        variant = INTENSITY_VARIANTS.get(intensity, "compact")
+
+    if variant == "full" and text_tokens + estimate_tokens(FULL_SYSTEM_PROMPT) > MAX_PROMPT_TOKENS:
+        variant = "compact"
+    return variant
+
+
+def build_humanize_messages(text, intensity="medium", polish=False):
+    """
+    Chat messages for a humanize call.
+
+    Args:
+        text: The text to humanize
+        intensity: "light", "medium" or "heavy"
+        polish: Fold the readability polish into the same call
+
+    Returns:
+        (messages, estimated prompt tokens)
+    """
+    variant = choose_variant(intensity, estimate_tokens(text))
+    system_prompt = SYSTEM_PROMPTS[variant]
+    if polish:
+        system_prompt += POLISH_INSTRUCTION
+
+    user_prompt = f"""{INTENSITY_PROMPTS.get(intensity, INTENSITY_PROMPTS["medium"])}
+
+Text to humanize:
+{quote(text)}"""
+
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
+    return messages, estimate_messages(messages)
+
+
+def build_polish_messages(text):
+    """Chat messages for a polish call. Returns (messages, estimated prompt tokens)."""
+    user_prompt = f"""Lightly polish this text for readability. Fix any awkward phrasing from automated processing, but keep the content and style intact. Only make minimal necessary corrections.
+
+Text:
+{quote(text)}"""
+
+    messages = [
+        {"role": "system", "content": POLISH_SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt}
+    ]
+    return messages, estimate_messages(messages)
+
+
+def estimate_messages(messages):
+    """Estimated prompt tokens for a message list, including per-message overhead."""
+    return sum(estimate_tokens(m["content"]) + 4 for m in messages)
+
+
+class TokenUsage:
+    """
+    Accumulates estimated and reported token counts across a request's calls.
+    Tokens spent by losing hedged attempts aren't included (they usually
+    finish after the response is sent); hedged_attempts counts those calls.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.estimated_prompt_tokens = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.hedged_attempts = 0
+        self._lock = threading.Lock()
+
+    def record(self, estimated, response):
+        """Add one call's local estimate and the API's reported usage, if any."""
+        usage = response.get("usage") or {}
+        with self._lock:
+            self.calls += 1
+            self.estimated_prompt_tokens += estimated
+            self.prompt_tokens += usage.get("prompt_tokens", 0)
+            self.completion_tokens += usage.get("completion_tokens", 0)
+
+    def record_hedge(self):
+        """Count one extra attempt issued by request hedging."""
+        with self._lock:
+            self.hedged_attempts += 1
+
+    def merge(self, other):
+        """Add the counts from another TokenUsage (e.g. a winning hedged attempt)."""
+        counts = other.to_dict()
+        with self._lock:
+            self.calls += counts["calls"]
+            self.estimated_prompt_tokens += counts["estimated_prompt_tokens"]
+            self.prompt_tokens += counts["prompt_tokens"]
+            self.completion_tokens += counts["completion_tokens"]
+            self.hedged_attempts += counts["hedged_attempts"]
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "estimated_prompt_tokens": self.estimated_prompt_tokens,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "hedged_attempts": self.hedged_attempts,
+            }
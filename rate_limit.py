@@ -0,0 +1,207 @@
+"""
+Per-User Rate Limiting
+Token-bucket limits and concurrency quotas, keyed on user id, with separate
+budgets for NLP-only and AI-backed work.
+"""
+
+import math
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Budget:
+    """Limits for one kind of work."""
+    per_minute: float
+    burst: int
+    max_concurrent: int
+
+    @property
+    def refill_rate(self):
+        """Tokens added per second."""
+        return self.per_minute / 60.0
+
+
+@dataclass
+class Decision:
+    """Result of a limiter check. Call release() when the work is done."""
+    allowed: bool
+    retry_after: int = 0
+    reason: str = ''
+    _release: object = None
+
+    def release(self):
+        if self._release is not None:
+            self._release()
+            self._release = None
+
+
+def refill(tokens, updated, now, budget):
+    """Bucket level after refilling from `updated` to `now`."""
+    return min(budget.burst, tokens + (now - updated) * budget.refill_rate)
+
+
+class MemoryBackend:
+    """
+    Token buckets in a process-local dict. Every `sweep_interval` seconds,
+    buckets that have refilled to their burst are dropped: they hold no
+    state beyond the default, so memory only grows with recently active users.
+    """
+
+    def __init__(self, sweep_interval=60.0):
+        self.sweep_interval = sweep_interval
+        self._buckets = {}  # key -> (tokens, updated, budget)
+        self._last_sweep = None
+        self._lock = threading.Lock()
+
+    def take(self, key, budget, now=None):
+        """Take one token. Returns seconds to wait if the bucket is empty, else 0."""
+        now = now if now is not None else time.monotonic()
+
+        with self._lock:
+            if self._last_sweep is None or now - self._last_sweep >= self.sweep_interval:
+                self._sweep(now)
+
+            tokens, updated, _ = self._buckets.get(key, (budget.burst, now, budget))
+            tokens = refill(tokens, updated, now, budget)
+
+            if tokens < 1:
+                self._buckets[key] = (tokens, now, budget)
+                return (1 - tokens) / budget.refill_rate
+
+            self._buckets[key] = (tokens - 1, now, budget)
+            return 0
+
+    def _sweep(self, now):
+        """Drop full buckets. Caller holds the lock."""
+        full = [key for key, (tokens, updated, budget) in self._buckets.items()
+                if refill(tokens, updated, now, budget) >= budget.burst]
+        for key in full:
+            del self._buckets[key]
+        self._last_sweep = now
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class SQLiteBackend:
+    """
+    Token buckets in a local SQLite file, shared by every worker process
+    on the machine. Each take() is a single IMMEDIATE transaction.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        conn = self._connect()
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets "
+                "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+        finally:
+            conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5, isolation_level=None)
+
+    def take(self, key, budget, now=None):
+        """Take one token. Returns seconds to wait if the bucket is empty, else 0."""
+        # Wall clock, since the file outlives any one process
+        now = now if now is not None else time.time()
+
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens, updated = row if row else (budget.burst, now)
+            tokens = refill(tokens, updated, now, budget)
+
+            if tokens < 1:
+                wait = (1 - tokens) / budget.refill_rate
+            else:
+                tokens -= 1
+                wait = 0
+
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                (key, tokens, now),
+            )
+            conn.execute("COMMIT")
+            return wait
+        except Exception:
+            # BEGIN itself can fail (e.g. database locked), leaving nothing to roll back
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+
+class RateLimiter:
+    """
+    Combines a token bucket (requests per minute) with a cap on in-flight
+    requests per user and kind of work. Concurrency is tracked per process.
+    """
+
+    def __init__(self, backend, budgets):
+        self.backend = backend
+        self.budgets = budgets
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, user_id, kind):
+        """
+        Check both limits for user_id. A denied Decision holds nothing to
+        release. Backend errors propagate, also without holding a slot.
+        """
+        budget = self.budgets[kind]
+        key = f"{kind}:{user_id}"
+
+        with self._lock:
+            if self._in_flight.get(key, 0) >= budget.max_concurrent:
+                return Decision(False, retry_after=1, reason='Too many concurrent requests')
+            self._in_flight[key] = self._in_flight.get(key, 0) + 1
+
+        def release():
+            with self._lock:
+                self._in_flight[key] -= 1
+                if not self._in_flight[key]:
+                    del self._in_flight[key]
+
+        try:
+            wait = self.backend.take(key, budget)
+        except Exception:
+            release()
+            raise
+
+        if wait:
+            release()
+            return Decision(False, retry_after=math.ceil(wait), reason='Rate limit exceeded')
+
+        return Decision(True, _release=release)
+
+
+def create_rate_limiter():
+    """Build the limiter from environment variables."""
+    budgets = {
+        'nlp': Budget(
+            per_minute=float(os.getenv('NLP_RATE_PER_MINUTE', '30')),
+            burst=int(os.getenv('NLP_RATE_BURST', '10')),
+            max_concurrent=int(os.getenv('NLP_MAX_CONCURRENT', '4')),
+        ),
+        'ai': Budget(
+            per_minute=float(os.getenv('AI_RATE_PER_MINUTE', '6')),
+            burst=int(os.getenv('AI_RATE_BURST', '3')),
+            max_concurrent=int(os.getenv('AI_MAX_CONCURRENT', '1')),
+        ),
+    }
+
+    if os.getenv('RATE_LIMIT_BACKEND', 'memory') == 'sqlite':
+        backend = SQLiteBackend(os.getenv('RATE_LIMIT_DB', '/tmp/humanizer_rate_limit.db'))
+    else:
+        backend = MemoryBackend()
+
+    return RateLimiter(backend, budgets)
@@ -0,0 +1,270 @@
+"""
+Tail-Latency Control for Upstream AI Calls
+Request hedging driven by observed latency percentiles, plus a circuit
+breaker that lets the API fall back to NLP-only output when Cerebras is
+failing or slow.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling upstream while the breaker is open."""
+
+
+class LatencyTracker:
+    """Rolling window of recent call latencies (seconds)."""
+
+    def __init__(self, window=200, min_samples=20):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency):
+        with self._lock:
+            self._samples.append(latency)
+
+    def percentile(self, p):
+        """The p-th percentile latency, or None until there are enough samples."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(len(ordered) * p / 100))
+        return ordered[index]
+
+
+class CircuitBreaker:
+    """
+    Opens when, over the last `window` calls, the error rate or the share
+    of calls slower than `slow_call_seconds` crosses its threshold. After
+    `cooldown` seconds one trial call is let through (half-open); its
+    outcome closes or re-opens the circuit.
+
+    allow() hands out a ticket that must be passed back to record(), so
+    only the trial call's outcome can close the circuit. Calls that were
+    admitted before it opened don't count once it has.
+    """
+
+    NORMAL = 'normal'
+    TRIAL = 'trial'
+
+    def __init__(self, window=20, min_calls=5, error_rate=0.5,
+                 slow_call_seconds=30.0, slow_call_rate=0.5, cooldown=30.0):
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.cooldown = cooldown
+        self._outcomes = deque(maxlen=window)  # (ok, latency)
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if time.monotonic() - self._opened_at >= self.cooldown:
+                return 'half_open'
+            return 'open'
+
+    def allow(self):
+        """A ticket (NORMAL or TRIAL) if a call may go upstream now, else None."""
+        with self._lock:
+            if self._opened_at is None:
+                return self.NORMAL
+            if time.monotonic() - self._opened_at < self.cooldown or self._trial_in_flight:
+                return None
+            self._trial_in_flight = True
+            return self.TRIAL
+
+    def record(self, ticket, ok, latency):
+        """Report the outcome of a call admitted with `ticket`."""
+        with self._lock:
+            slow = latency >= self.slow_call_seconds
+
+            # Half-open trial decides the circuit on its own
+            if ticket == self.TRIAL:
+                self._trial_in_flight = False
+                if ok and not slow:
+                    self._opened_at = None
+                    self._outcomes.clear()
+                else:
+                    self._opened_at = time.monotonic()
+                return
+
+            # Straggler admitted before the circuit opened
+            if self._opened_at is not None:
+                return
+
+            self._outcomes.append((ok, latency))
+            if len(self._outcomes) < self.min_calls:
+                return
+
+            calls = len(self._outcomes)
+            errors = sum(1 for ok_, _ in self._outcomes if not ok_)
+            slow_calls = sum(1 for _, lat in self._outcomes if lat >= self.slow_call_seconds)
+            if errors / calls >= self.error_rate or slow_calls / calls >= self.slow_call_rate:
+                self._opened_at = time.monotonic()
+
+
+class ResilientCaller:
+    """
+    Wraps an upstream function with optional hedging and a circuit breaker.
+
+    With hedging on, if the first attempt hasn't answered by the tracked
+    `hedge_percentile` latency (never sooner than `min_hedge_delay`), a
+    second identical attempt is started and whichever succeeds first wins.
+    The loser can't be cancelled mid-request; its result is discarded.
+    A `usage` keyword argument (TokenUsage) only receives the winning
+    attempt's tokens, plus a count of hedges issued.
+
+    Until there's enough latency history to pick a delay, calls run on the
+    caller's thread. After that the first attempt gets its own thread (so
+    the caller can return as soon as a hedge wins) and only hedges go to
+    the bounded pool; when the pool is busy, the hedge is skipped.
+    """
+
+    def __init__(self, breaker=None, hedge=False, hedge_percentile=95,
+                 min_hedge_delay=1.0, max_workers=16):
+        self.breaker = breaker or CircuitBreaker()
+        self.latencies = LatencyTracker()
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.min_hedge_delay = min_hedge_delay
+        self.hedged_calls = 0
+        self.skipped_hedges = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers) if hedge else None
+        self._hedge_slots = threading.BoundedSemaphore(max_workers)
+
+    def hedge_delay(self):
+        """Seconds to wait before issuing the hedge request."""
+        threshold = self.latencies.percentile(self.hedge_percentile)
+        if threshold is None:
+            return None  # Not enough history yet
+        return max(threshold, self.min_hedge_delay)
+
+    def call(self, fn, *args, **kwargs):
+        """Call fn through the breaker (and hedging, if enabled)."""
+        ticket = self.breaker.allow()
+        if ticket is None:
+            raise CircuitOpenError("AI service temporarily unavailable")
+
+        start = time.monotonic()
+        ok = False
+        try:
+            if self.hedge:
+                result = self._hedged(fn, args, kwargs)
+            else:
+                result = self._attempt(fn, args, kwargs)
+            ok = True
+            return result
+        finally:
+            self.breaker.record(ticket, ok, time.monotonic() - start)
+
+    def _attempt(self, fn, args, kwargs):
+        """One upstream call; its own latency feeds the hedge delay."""
+        start = time.monotonic()
+        result = fn(*args, **kwargs)
+        self.latencies.record(time.monotonic() - start)
+        return result
+
+    def _hedge_attempt(self, fn, args, kwargs):
+        try:
+            return self._attempt(fn, args, kwargs)
+        finally:
+            self._hedge_slots.release()
+
+    def _start_thread(self, fn, args, kwargs):
+        """Run one attempt on a dedicated thread, returning its Future."""
+        future = Future()
+
+        def run():
+            future.set_running_or_notify_cancel()
+            try:
+                future.set_result(self._attempt(fn, args, kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, name='ai-attempt', daemon=True).start()
+        return future
+
+    def _hedged(self, fn, args, kwargs):
+        delay = self.hedge_delay()
+        if delay is None:
+            return self._attempt(fn, args, kwargs)
+
+        # Each attempt records token usage into its own copy; only the
+        # winner's is merged back, so a losing attempt is never counted
+        usage = kwargs.get('usage')
+        attempt_usage = {}
+
+        def start(submit, *submit_args):
+            own_kwargs = kwargs if usage is None else dict(kwargs, usage=type(usage)())
+            future = submit(*submit_args, fn, args, own_kwargs)
+            attempt_usage[future] = own_kwargs.get('usage')
+            return future
+
+        def finish(future):
+            result = future.result()
+            if usage is not None:
+                usage.merge(attempt_usage[future])
+            return result
+
+        first = start(self._start_thread)
+        done, _ = wait([first], timeout=delay)
+        if done:
+            return finish(first)
+
+        if not self._hedge_slots.acquire(blocking=False):
+            with self._lock:
+                self.skipped_hedges += 1
+            return finish(first)
+
+        with self._lock:
+            self.hedged_calls += 1
+        if usage is not None:
+            usage.record_hedge()
+        pending = {first, start(self._executor.submit, self._hedge_attempt)}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return finish(future)
+                error = future.exception()
+        raise error
+
+    def stats(self):
+        with self._lock:
+            hedged_calls, skipped_hedges = self.hedged_calls, self.skipped_hedges
+        return {
+            'breaker': self.breaker.state,
+            'hedging': self.hedge,
+            'hedge_delay': self.hedge_delay() if self.hedge else None,
+            'hedged_calls': hedged_calls,
+            'skipped_hedges': skipped_hedges,
+        }
+
+
+def create_ai_caller():
+    """Build the upstream caller from environment variables."""
+    breaker = CircuitBreaker(
+        error_rate=float(os.getenv('BREAKER_ERROR_RATE', '0.5')),
+        slow_call_seconds=float(os.getenv('BREAKER_SLOW_CALL_SECONDS', '30')),
+        slow_call_rate=float(os.getenv('BREAKER_SLOW_CALL_RATE', '0.5')),
+        cooldown=float(os.getenv('BREAKER_COOLDOWN_SECONDS', '30')),
+    )
+    return ResilientCaller(
+        breaker=breaker,
+        hedge=os.getenv('HEDGE_REQUESTS', 'false').lower() == 'true',
+        hedge_percentile=float(os.getenv('HEDGE_PERCENTILE', '95')),
+        min_hedge_delay=float(os.getenv('HEDGE_MIN_DELAY_SECONDS', '1')),
+    )
@@ -16,6 +16,21 @@ let clerkLoaded = false;
 let isAuthenticated = false;
 let sessionToken = null;
 
+// Identifies the document being edited so the server can reuse output
+// for paragraphs that haven't changed since the last submission
+function newDocumentId() {
+    if (window.crypto && typeof crypto.randomUUID === 'function') {
+        return crypto.randomUUID();
+    }
+    // randomUUID needs a secure context (HTTPS or localhost)
+    return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+}
+
+let documentId = newDocumentId();
+
+// Text of the last successful submission; humanizing it again asks for fresh output
+let lastSubmittedText = null;
+
 // Clerk appearance configuration for dark theme
 const clerkAppearance = {
     baseTheme: undefined,
@@ -712,7 +727,10 @@ async function humanize() {
                 text: text,
                 mode: settings.mode,
                 intensity: settings.intensity,
-                options: settings.options
+                options: settings.options,
+                include_original: false,
+                document_id: documentId,
+                regenerate: text === lastSubmittedText
             })
         });
 
@@ -728,6 +746,8 @@ async function humanize() {
         }
 
         if (data.success) {
+            lastSubmittedText = text;
+
             // Clear placeholder and show text
             outputText.innerHTML = '';
             outputText.textContent = data.humanized;
@@ -766,6 +786,8 @@ async function pasteFromClipboard() {
 
 function clearInput() {
     inputText.value = '';
+    documentId = newDocumentId();
+    lastSubmittedText = null;
     updateInputCounts();
 
     // Reset output